@@ -79,6 +79,26 @@ engine_opts = [
     cfg.IntOpt('execution_field_size_limit_kb', default=1024,
                help='The default maximum size in KB of large text fields '
                     'of runtime execution objects. Use -1 for no limit.'),
+    cfg.IntOpt('spec_cache_size', default=1000,
+               help='The maximum number of parsed workflow and task '
+                    'specifications kept in memory. Use 0 to disable '
+                    'the cache.'),
+    cfg.IntOpt('yaql_cache_size', default=10000,
+               help='The maximum number of parsed YAQL expressions kept '
+                    'in memory. Use 0 to disable the cache.'),
+    cfg.IntOpt('delayed_call_claim_batch_size', default=1000,
+               help='The maximum number of delayed calls an engine node '
+                    'claims at once. Smaller values spread the calls '
+                    'among more engine nodes.'),
+    cfg.IntOpt('delayed_call_lease_time', default=60,
+               help='Time in seconds a delayed call stays claimed by an '
+                    'engine node. If the node fails to make the call '
+                    'within this time the call can be claimed by another '
+                    'node.'),
+    cfg.IntOpt('delayed_call_pool_size', default=100,
+               help='The maximum number of delayed calls an engine node '
+                    'makes concurrently. Calls belonging to the same '
+                    'workflow execution are always made one by one.'),
 ]
 
 executor_opts = [
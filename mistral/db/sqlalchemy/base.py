@@ -33,6 +33,12 @@ options.set_defaults(cfg.CONF, connection="sqlite:///mistral.sqlite")
 
 _DB_SESSION_THREAD_LOCAL_NAME = "db_sql_alchemy_session"
 
+# Keys of session info dictionary under which transaction cache and
+# after commit callbacks are stored.
+_TX_CACHE_KEY = "mistral_tx_cache"
+_TX_CALLBACKS_KEY = "mistral_tx_callbacks"
+_TX_COMMITTED_CALLBACKS_KEY = "mistral_tx_committed_callbacks"
+
 _facade = None
 
 
@@ -144,6 +150,12 @@ def commit_tx():
 
     ses.commit()
 
+    # Callbacks can be run only when the session is released so for now
+    # just remember that the changes they rely on are committed.
+    callbacks = ses.info.pop(_TX_CALLBACKS_KEY, [])
+
+    ses.info.setdefault(_TX_COMMITTED_CALLBACKS_KEY, []).extend(callbacks)
+
 
 def rollback_tx():
     """Rolls back previously started database transaction."""
@@ -156,6 +168,11 @@ def rollback_tx():
 
     ses.rollback()
 
+    # Data cached within the transaction may be based on rolled back
+    # changes.
+    ses.info.pop(_TX_CACHE_KEY, None)
+    ses.info.pop(_TX_CALLBACKS_KEY, None)
+
 
 def end_tx():
     """Ends current database transaction.
@@ -173,9 +190,57 @@ def end_tx():
 
     release_locks_if_sqlite(ses)
 
+    ses.info.pop(_TX_CACHE_KEY, None)
+
+    callbacks = ses.info.pop(_TX_COMMITTED_CALLBACKS_KEY, [])
+
     ses.close()
     _set_thread_local_session(None)
 
+    for func, args, kwargs in callbacks:
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            LOG.exception(
+                "After commit callback failed [func=%s, exception=%s]",
+                func, e
+            )
+
+
+def add_after_commit_callback(func, *args, **kwargs):
+    """Makes the given function called once current transaction commits.
+
+    The function is called after the transaction ends so it's free to
+    start a new one. If the transaction gets rolled back the function
+    is not called at all. If there's no explicitly started transaction
+    the function is called immediately since all the changes made so far
+    are already committed.
+    """
+    ses = _get_thread_local_session()
+
+    if not ses:
+        func(*args, **kwargs)
+
+        return
+
+    ses.info.setdefault(_TX_CALLBACKS_KEY, []).append((func, args, kwargs))
+
+
+def get_tx_cache():
+    """Returns a dictionary for caching data within current transaction.
+
+    The dictionary lives as long as the transaction so it's suitable
+    for data derived from database objects that needs to be recalculated
+    only if the objects change. Returns None if there's no explicitly
+    started transaction.
+    """
+    ses = _get_thread_local_session()
+
+    if not ses:
+        return None
+
+    return ses.info.setdefault(_TX_CACHE_KEY, {})
+
 
 @session_aware()
 def get_driver_name(session=None):
@@ -0,0 +1,37 @@
+# Copyright 2015 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add index on (processing, execution_time) to the table delayed_calls_v2
+
+Revision ID: 007
+Revises: 006
+Create Date: 2015-10-12 11:20:14.517348
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index(
+        'delayed_calls_v2_processing_execution_time',
+        'delayed_calls_v2',
+        ['processing', 'execution_time'],
+        unique=False
+    )
@@ -0,0 +1,40 @@
+# Copyright 2015 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add columns 'lease_owner' and 'lease_expiry' to the table delayed_calls_v2
+
+Revision ID: 008
+Revises: 007
+Create Date: 2015-10-14 16:05:41.762839
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column(
+        'delayed_calls_v2',
+        sa.Column('lease_owner', sa.String(80), nullable=True)
+    )
+    op.add_column(
+        'delayed_calls_v2',
+        sa.Column('lease_expiry', sa.DateTime(), nullable=True)
+    )
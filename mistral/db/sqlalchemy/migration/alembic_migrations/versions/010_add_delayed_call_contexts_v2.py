@@ -0,0 +1,46 @@
+# Copyright 2015 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add table delayed_call_contexts_v2
+
+Revision ID: 010
+Revises: 009
+Create Date: 2015-10-16 14:47:30.512308
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+
+from alembic import op
+import sqlalchemy as sa
+
+from mistral.db.sqlalchemy import types as st
+
+
+def upgrade():
+    op.create_table(
+        'delayed_call_contexts_v2',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('auth_context', st.JsonEncoded(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column(
+        'delayed_calls_v2',
+        sa.Column('auth_context_id', sa.String(64), nullable=True)
+    )
@@ -0,0 +1,42 @@
+# Copyright 2015 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add column 'key' to the table delayed_calls_v2
+
+Revision ID: 011
+Revises: 010
+Create Date: 2015-10-19 10:03:52.174926
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.add_column(
+        'delayed_calls_v2',
+        sa.Column('key', sa.String(250), nullable=True)
+    )
+    op.create_index(
+        'delayed_calls_v2_key',
+        'delayed_calls_v2',
+        ['key'],
+        unique=False
+    )
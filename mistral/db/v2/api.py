@@ -59,6 +59,27 @@ def transaction():
         yield
 
 
+def get_transaction_cache():
+    """Returns a dictionary for caching data within current transaction.
+
+    Returns None if a transaction hasn't been explicitly started.
+    """
+    return IMPL.get_transaction_cache()
+
+
+def add_after_commit_callback(func, *args, **kwargs):
+    """Calls the given function once current transaction commits.
+
+    If a transaction hasn't been explicitly started the function is
+    called immediately.
+    """
+    IMPL.add_after_commit_callback(func, *args, **kwargs)
+
+
+def get_driver_name():
+    return IMPL.get_driver_name()
+
+
 # Locking.
 
 
@@ -256,6 +277,10 @@ def create_action_execution(values):
     return IMPL.create_action_execution(values)
 
 
+def create_action_executions(values_list):
+    return IMPL.create_action_executions(values_list)
+
+
 def update_action_execution(id, values):
     return IMPL.update_action_execution(id, values)
 
@@ -355,18 +380,40 @@ def delete_task_executions(**kwargs):
 
 # Delayed calls.
 
-def get_delayed_calls_to_start(time):
-    return IMPL.get_delayed_calls_to_start(time)
+def get_delayed_calls_to_start(time, start_time=None, limit=None):
+    return IMPL.get_delayed_calls_to_start(time, start_time, limit)
 
 
 def create_delayed_call(values):
     return IMPL.create_delayed_call(values)
 
 
+def create_delayed_calls(values_list):
+    return IMPL.create_delayed_calls(values_list)
+
+
 def delete_delayed_call(id):
     return IMPL.delete_delayed_call(id)
 
 
+def claim_delayed_calls_to_start(time, lease_owner, lease_expiry,
+                                 limit=None):
+    return IMPL.claim_delayed_calls_to_start(
+        time,
+        lease_owner,
+        lease_expiry,
+        limit
+    )
+
+
+def delete_delayed_calls(ids, lease_owner=None):
+    return IMPL.delete_delayed_calls(ids, lease_owner)
+
+
+def delete_delayed_calls_by_keys(keys):
+    return IMPL.delete_delayed_calls_by_keys(keys)
+
+
 def update_delayed_call(id, values, query_filter=None):
     return IMPL.update_delayed_call(id, values, query_filter)
 
@@ -375,6 +422,18 @@ def get_delayed_call(id):
     return IMPL.get_delayed_call(id)
 
 
+def get_delayed_call_context(id):
+    return IMPL.get_delayed_call_context(id)
+
+
+def ensure_delayed_call_context(id, auth_context):
+    return IMPL.ensure_delayed_call_context(id, auth_context)
+
+
+def delete_unused_delayed_call_contexts(used_before):
+    return IMPL.delete_unused_delayed_call_contexts(used_before)
+
+
 # Cron triggers.
 
 def get_cron_trigger(name):
@@ -14,6 +14,7 @@
 #    limitations under the License.
 
 import contextlib
+import datetime
 import sys
 
 from oslo_config import cfg
@@ -23,6 +24,7 @@ from oslo_db.sqlalchemy import utils as db_utils
 from oslo_log import log as logging
 from oslo_utils import timeutils
 import sqlalchemy as sa
+from sqlalchemy.orm import attributes as orm_attrs
 
 from mistral.db.sqlalchemy import base as b
 from mistral.db.sqlalchemy import model_base as mb
@@ -79,6 +81,18 @@ def end_tx():
     b.end_tx()
 
 
+def get_transaction_cache():
+    return b.get_tx_cache()
+
+
+def add_after_commit_callback(func, *args, **kwargs):
+    b.add_after_commit_callback(func, *args, **kwargs)
+
+
+def get_driver_name():
+    return b.get_driver_name()
+
+
 @contextlib.contextmanager
 def transaction():
     try:
@@ -592,6 +606,34 @@ def create_action_execution(values, session=None):
     return a_ex
 
 
+@b.session_aware()
+def create_action_executions(values_list, session=None):
+    """Creates action executions flushing them all at once.
+
+    Ids need to be assigned in advance so that rows get inserted by
+    batched statements.
+    """
+    a_exs = []
+
+    for values in values_list:
+        a_ex = models.ActionExecution()
+
+        a_ex.update(values.copy())
+
+        a_exs.append(a_ex)
+
+    session.add_all(a_exs)
+
+    try:
+        session.flush(a_exs)
+    except db_exc.DBDuplicateEntry as e:
+        raise exc.DBDuplicateEntryException(
+            "Duplicate entry for ActionExecution: %s" % e.columns
+        )
+
+    return a_exs
+
+
 @b.session_aware()
 def update_action_execution(id, values, session=None):
     a_ex = _get_action_execution(id)
@@ -828,6 +870,27 @@ def create_delayed_call(values, session=None):
     return delayed_call
 
 
+@b.session_aware()
+def create_delayed_calls(values_list, session=None):
+    """Inserts delayed calls with batched statements.
+
+    Unlike create_delayed_call it doesn't load created objects into
+    the session so ids need to be assigned in advance.
+    """
+    if not values_list:
+        return
+
+    try:
+        # Core insert with multiple parameter sets is executed as one
+        # batched statement (session.bulk_insert_mappings() needs
+        # SQLAlchemy 1.0).
+        session.execute(models.DelayedCall.__table__.insert(), values_list)
+    except db_exc.DBDuplicateEntry as e:
+        raise exc.DBDuplicateEntryException(
+            "Duplicate entry for DelayedCall: %s" % e.columns
+        )
+
+
 @b.session_aware()
 def delete_delayed_call(id, session=None):
     delayed_call = _get_delayed_call(id)
@@ -841,16 +904,114 @@ def delete_delayed_call(id, session=None):
 
 
 @b.session_aware()
-def get_delayed_calls_to_start(time, session=None):
+def get_delayed_calls_to_start(time, start_time=None, limit=None,
+                               session=None):
     query = b.model_query(models.DelayedCall)
 
     query = query.filter(models.DelayedCall.execution_time < time)
+
+    if start_time:
+        query = query.filter(models.DelayedCall.execution_time >= start_time)
+
     query = query.filter_by(processing=False)
     query = query.order_by(models.DelayedCall.execution_time)
 
+    if limit:
+        query = query.limit(limit)
+
     return query.all()
 
 
+@b.session_aware()
+def claim_delayed_calls_to_start(time, lease_owner, lease_expiry,
+                                 limit=None, session=None):
+    """Leases delayed calls to start to the given owner and returns them.
+
+    Besides calls that haven't been claimed yet, calls whose lease has
+    expired get claimed too since their previous owner is supposed to
+    have failed to make them. Calls get claimed with one query so that
+    the same calls can't be claimed by parallel transactions.
+    """
+    now = datetime.datetime.now()
+    model = models.DelayedCall
+
+    query = b.model_query(model)
+
+    query = query.filter(model.execution_time < time)
+    query = query.filter(
+        sa.or_(
+            model.processing == sa.false(),
+            model.lease_expiry == sa.null(),
+            model.lease_expiry < now
+        )
+    )
+    query = query.order_by(model.execution_time)
+
+    if limit:
+        query = query.limit(limit)
+
+    # Lock selected rows so that parallel transactions wait until this
+    # one commits and then skip the calls as already being processed.
+    calls = query.with_for_update().all()
+
+    if not calls:
+        return []
+
+    values = {
+        'processing': True,
+        'lease_owner': lease_owner,
+        'lease_expiry': lease_expiry
+    }
+
+    b.model_query(model).filter(
+        model.id.in_([c.id for c in calls])
+    ).update(values, synchronize_session=False)
+
+    # Bring loaded objects in line with DB without extra updates.
+    for c in calls:
+        for k, v in values.items():
+            orm_attrs.set_committed_value(c, k, v)
+
+    return calls
+
+
+@b.session_aware()
+def delete_delayed_calls(ids, lease_owner=None, session=None):
+    """Deletes delayed calls with the given ids using one query.
+
+    If lease owner is given only calls leased to it get deleted so that
+    calls whose lease has expired and which have been claimed by another
+    owner are left to it.
+    """
+    if not ids:
+        return 0
+
+    query = b.model_query(models.DelayedCall).filter(
+        models.DelayedCall.id.in_(ids)
+    )
+
+    if lease_owner:
+        query = query.filter_by(lease_owner=lease_owner)
+
+    return query.delete(synchronize_session=False)
+
+
+@b.session_aware()
+def delete_delayed_calls_by_keys(keys, session=None):
+    """Deletes delayed calls with the given keys using one query.
+
+    Calls that are already being made are left intact.
+    """
+    if not keys:
+        return 0
+
+    return b.model_query(models.DelayedCall).filter(
+        models.DelayedCall.key.in_(keys)
+    ).filter_by(
+        processing=False
+    ).delete(synchronize_session=False)
+
+
 @b.session_aware()
 def update_delayed_call(id, values, query_filter=None, session=None):
     if query_filter:
@@ -913,6 +1074,103 @@ def _get_delayed_call(id, session=None):
     return query.filter_by(id=id).first()
 
 
+@b.session_aware()
+def get_delayed_call_context(id, session=None):
+    ctx = b.model_query(models.DelayedCallContext).filter_by(id=id).first()
+
+    if not ctx:
+        raise exc.NotFoundException(
+            "Delayed call context not found [id=%s]" % id
+        )
+
+    return ctx
+
+
+# Stored delayed call contexts get marked as used at most once per this
+# time.
+_DELAYED_CALL_CONTEXT_USE_INTERVAL = datetime.timedelta(hours=1)
+
+
+@b.session_aware()
+def ensure_delayed_call_context(id, auth_context, session=None):
+    """Stores the security context unless it's already stored.
+
+    A context that is already stored gets marked as used only if it
+    hasn't been for a while. Contexts used recently are kept by
+    delete_unused_delayed_call_contexts() anyway, so the context row
+    isn't locked by every transaction scheduling calls with it.
+    """
+    model = models.DelayedCallContext
+
+    used = b.model_query(
+        model,
+        columns=(model.created_at, model.updated_at)
+    ).filter_by(id=id).first()
+
+    if used:
+        now = timeutils.utcnow()
+        used_at = used.updated_at or used.created_at
+
+        if now - used_at < _DELAYED_CALL_CONTEXT_USE_INTERVAL:
+            return
+
+        updated = b.model_query(model).filter_by(id=id).update(
+            {'updated_at': now},
+            synchronize_session=False
+        )
+
+        # If the context has been deleted as unused meanwhile it's stored
+        # again.
+        if updated:
+            return
+
+    ctx = model(id=id, auth_context=auth_context)
+
+    try:
+        # Savepoint keeps the transaction usable if a parallel one has
+        # stored the same context in the meantime.
+        with session.begin_nested():
+            session.add(ctx)
+    except db_exc.DBDuplicateEntry:
+        LOG.debug("Delayed call context is already stored [id=%s]", id)
+
+
+@b.session_aware()
+def delete_unused_delayed_call_contexts(used_before, session=None):
+    """Deletes contexts which no delayed call refers to anymore.
+
+    Contexts used after the given time are kept even if no delayed call
+    refers to them yet since calls scheduled with them may be still
+    uncommitted. Contexts to delete get locked and checked once again
+    so that ones getting used meanwhile are kept.
+    """
+    model = models.DelayedCallContext
+
+    used_ids = sa.select([models.DelayedCall.auth_context_id]).where(
+        models.DelayedCall.auth_context_id != sa.null()
+    )
+
+    def _filter_unused(query):
+        return query.filter(
+            sa.func.coalesce(model.updated_at, model.created_at) <
+            used_before
+        ).filter(
+            ~model.id.in_(used_ids)
+        )
+
+    ids = [
+        ctx.id
+        for ctx in _filter_unused(b.model_query(model)).with_for_update()
+    ]
+
+    if not ids:
+        return 0
+
+    return _filter_unused(
+        b.model_query(model).filter(model.id.in_(ids))
+    ).delete(synchronize_session=False)
+
+
 # Cron triggers.
 
 def get_cron_trigger(name):
@@ -252,6 +252,15 @@ class DelayedCall(mb.MistralModelBase):
 
     __tablename__ = 'delayed_calls_v2'
 
+    __table_args__ = (
+        sa.Index(
+            'delayed_calls_v2_processing_execution_time',
+            'processing',
+            'execution_time'
+        ),
+        sa.Index('delayed_calls_v2_key', 'key'),
+    )
+
     id = mb.id_column()
     factory_method_path = sa.Column(sa.String(200), nullable=True)
     target_method_name = sa.Column(sa.String(80), nullable=False)
@@ -260,6 +269,26 @@ class DelayedCall(mb.MistralModelBase):
     auth_context = sa.Column(st.JsonDictType())
     execution_time = sa.Column(sa.DateTime, nullable=False)
     processing = sa.Column(sa.Boolean, default=False, nullable=False)
+    lease_owner = sa.Column(sa.String(80), nullable=True)
+    lease_expiry = sa.Column(sa.DateTime, nullable=True)
+    # Calls belonging to the same workflow execution are made in order.
+    execution_id = sa.Column(sa.String(36), nullable=True)
+    auth_context_id = sa.Column(sa.String(64), nullable=True)
+    # Key the call can be cancelled by.
+    key = sa.Column(sa.String(250), nullable=True)
+
+
+class DelayedCallContext(mb.MistralModelBase):
+    """Contains security contexts delayed calls are made with.
+
+    Contexts are identified by a hash of their content so that calls
+    scheduled with the same context share one record.
+    """
+
+    __tablename__ = 'delayed_call_contexts_v2'
+
+    id = sa.Column(sa.String(64), primary_key=True)
+    auth_context = sa.Column(st.JsonDictType())
 
 
 class Environment(mb.MistralSecureModelBase):
@@ -19,10 +19,12 @@ from mistral.engine import utils as e_utils
 from mistral import exceptions as exc
 from mistral import expressions as expr
 from mistral.services import action_manager as a_m
+from mistral.services import scheduler
 from mistral.services import security
 from mistral import utils
 from mistral.utils import wf_trace
 from mistral.workbook import parser as spec_parser
+from mistral.workflow import data_flow
 from mistral.workflow import states
 from mistral.workflow import utils as wf_utils
 
@@ -37,7 +39,45 @@ def create_action_execution(action_def, action_input, task_ex=None,
     # session level cache is in generating ids. Ids are generated only on
     # session flush. And now we have a lot places where we need to have ids
     # before TX completion.
+    values = _get_action_execution_values(
+        action_def,
+        action_input,
+        task_ex,
+        index,
+        description
+    )
+
+    action_ex = db_api.create_action_execution(values)
+
+    if task_ex:
+        # Add to collection explicitly so that it's in a proper
+        # state within the current session.
+        task_ex.executions.append(action_ex)
+
+    return action_ex
 
+
+def create_action_executions(action_def, indexed_inputs, task_ex):
+    """Creates action executions of the task for all the given inputs.
+
+    Unlike calling create_action_execution for every input it writes
+    them to DB all at once.
+
+    :param indexed_inputs: List of tuples (index, action_input).
+    :return: List of created action executions.
+    """
+    action_exs = db_api.create_action_executions([
+        _get_action_execution_values(action_def, action_input, task_ex, idx)
+        for idx, action_input in indexed_inputs
+    ])
+
+    task_ex.executions.extend(action_exs)
+
+    return action_exs
+
+
+def _get_action_execution_values(action_def, action_input, task_ex=None,
+                                 index=0, description=''):
     # Assign the action execution ID here to minimize database calls.
     # Otherwise, the input property of the action execution DB object needs
     # to be updated with the action execution ID after the action execution
@@ -69,14 +109,7 @@ def create_action_execution(action_def, action_input, task_ex=None,
             'project_id': security.get_project_id(),
         })
 
-    action_ex = db_api.create_action_execution(values)
-
-    if task_ex:
-        # Add to collection explicitly so that it's in a proper
-        # state within the current session.
-        task_ex.executions.append(action_ex)
-
-    return action_ex
+    return values
 
 
 def _inject_action_ctx_for_validating(action_def, input_dict):
@@ -175,6 +208,9 @@ def store_action_result(action_ex, result):
 
     action_ex.accepted = True
 
+    if action_ex.task_execution_id:
+        data_flow.invalidate_task_result_cache(action_ex.task_execution_id)
+
     _log_action_result(action_ex, prev_state, action_ex.state, result)
 
     return action_ex
@@ -206,6 +242,12 @@ def run_existing_action(action_ex_id, target):
     )
 
 
+scheduler.register_callable(
+    'mistral.engine.action_handler.run_existing_action',
+    run_existing_action
+)
+
+
 def resolve_definition(action_name, task_ex=None, wf_spec=None):
     if task_ex and wf_spec:
         wf_ex = task_ex.workflow_execution
@@ -277,7 +319,9 @@ def transform_result(result, task_ex=None, action_ex=None):
 
     if task_ex:
         action_spec_name = spec_parser.get_task_spec(
-            task_ex.spec).get_action_name()
+            task_ex.spec,
+            validate=False
+        ).get_action_name()
     elif action_ex:
         if action_ex.spec:
             action_spec_name = spec_parser.get_action_spec(action_ex.spec)
@@ -287,7 +331,7 @@ def transform_result(result, task_ex=None, action_ex=None):
     if action_spec_name:
         wf_ex = task_ex.workflow_execution if task_ex else None
         wf_spec_name = (spec_parser.get_workflow_spec(
-            wf_ex.spec).get_name() if task_ex else None)
+            wf_ex.spec, validate=False).get_name() if task_ex else None)
 
         return transform_action_result(
             action_spec_name,
@@ -141,7 +141,10 @@ class TaskPolicy(object):
         :param task_spec: Task specification.
         """
         # No-op by default.
-        data_flow.evaluate_object_fields(self, task_ex.in_context)
+        data_flow.evaluate_object_fields(
+            self,
+            data_flow.get_task_expression_context(task_ex)
+        )
 
         self._validate()
 
@@ -152,7 +155,10 @@ class TaskPolicy(object):
         :param task_spec: Completed task specification.
         """
         # No-op by default.
-        data_flow.evaluate_object_fields(self, task_ex.in_context)
+        data_flow.evaluate_object_fields(
+            self,
+            data_flow.get_task_expression_context(task_ex)
+        )
 
         self._validate()
 
@@ -60,7 +60,10 @@ class DefaultEngine(base.Engine, coordination.Service):
 
             with db_api.transaction():
                 wf_def = db_api.get_workflow_definition(wf_name)
-                wf_spec = spec_parser.get_workflow_spec(wf_def.spec)
+                wf_spec = spec_parser.get_workflow_spec(
+                    wf_def.spec,
+                    validate=False
+                )
 
                 eng_utils.validate_input(wf_def, wf_input, wf_spec)
 
@@ -163,8 +166,8 @@ class DefaultEngine(base.Engine, coordination.Service):
             self._on_task_state_change(task_ex, wf_ex)
 
     def _on_task_state_change(self, task_ex, wf_ex):
-        task_spec = spec_parser.get_task_spec(task_ex.spec)
-        wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+        task_spec = spec_parser.get_task_spec(task_ex.spec, validate=False)
+        wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
 
         if task_handler.is_task_completed(task_ex, task_spec):
             task_handler.after_task_complete(task_ex, task_spec, wf_spec)
@@ -194,7 +197,12 @@ class DefaultEngine(base.Engine, coordination.Service):
         if states.is_paused_or_completed(wf_ex.state):
             return
 
-        if wf_utils.find_incomplete_task_executions(wf_ex):
+        # Dispatched commands could create new task executions or change
+        # states of existing ones so the controller needs to rebuild its
+        # index of task executions.
+        wf_ctrl.reset_task_executions_index()
+
+        if wf_ctrl.find_incomplete_task_executions():
             return
 
         if wf_ctrl.all_errors_handled():
@@ -289,7 +297,7 @@ class DefaultEngine(base.Engine, coordination.Service):
         self._dispatch_workflow_commands(wf_ex, cmds)
 
         if not cmds:
-            if not wf_utils.find_incomplete_task_executions(wf_ex):
+            if not wf_ctrl.find_incomplete_task_executions():
                 wf_handler.succeed_workflow(
                     wf_ex,
                     wf_ctrl.evaluate_workflow_final_context()
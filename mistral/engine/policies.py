@@ -27,6 +27,34 @@ _ENGINE_CLIENT_PATH = 'mistral.engine.rpc.get_engine_client'
 _RUN_EXISTING_TASK_PATH = 'mistral.engine.task_handler.run_existing_task'
 
 
+def _get_call_key(task_ex, policy_name):
+    return '%s:%s' % (task_ex.id, policy_name)
+
+
+def cancel_obsolete_calls(task_ex, task_policies):
+    """Cancels calls scheduled by task policies which the task no longer
+    needs after it has completed.
+
+    :param task_ex: Completed task DB model.
+    :param task_policies: Policies of the task. Nothing is done if none
+        of them schedules calls that become obsolete.
+    """
+    # Names of policies which scheduled calls become obsolete once a task
+    # completes by policy classes.
+    obsolete_policies = {
+        WaitBeforePolicy: 'wait-before',
+        TimeoutPolicy: 'timeout'
+    }
+
+    keys = [
+        _get_call_key(task_ex, obsolete_policies[type(p)])
+        for p in task_policies if type(p) in obsolete_policies
+    ]
+
+    if keys:
+        scheduler.cancel_calls(keys)
+
+
 def _log_task_delay(task_ex, delay_sec):
     wf_trace.info(
         task_ex,
@@ -191,6 +219,8 @@ class WaitBeforePolicy(base.TaskPolicy):
                 None,
                 _RUN_EXISTING_TASK_PATH,
                 self.delay,
+                execution_id=task_ex.workflow_execution_id,
+                key=_get_call_key(task_ex, 'wait-before'),
                 task_ex_id=task_ex.id,
             )
 
@@ -235,6 +265,8 @@ class WaitAfterPolicy(base.TaskPolicy):
             _ENGINE_CLIENT_PATH,
             'on_task_state_change',
             self.delay,
+            execution_id=task_ex.workflow_execution_id,
+            key=_get_call_key(task_ex, 'wait-after'),
             state=state,
             task_ex_id=task_ex.id,
         )
@@ -293,11 +325,7 @@ class RetryPolicy(base.TaskPolicy):
 
         policy_context = runtime_context[context_key]
 
-        retry_no = 0
-
-        if 'retry_no' in policy_context:
-            retry_no = policy_context['retry_no']
-            del policy_context['retry_no']
+        retry_no = policy_context.get('retry_no', 0)
 
         retries_remain = retry_no + 1 < self.count
 
@@ -323,6 +351,8 @@ class RetryPolicy(base.TaskPolicy):
             None,
             _RUN_EXISTING_TASK_PATH,
             self.delay,
+            execution_id=task_ex.workflow_execution_id,
+            key=_get_call_key(task_ex, 'retry'),
             task_ex_id=task_ex.id,
         )
 
@@ -344,6 +374,8 @@ class TimeoutPolicy(base.TaskPolicy):
             None,
             'mistral.engine.policies.fail_task_if_incomplete',
             self.delay,
+            execution_id=task_ex.workflow_execution_id,
+            key=_get_call_key(task_ex, 'timeout'),
             task_ex_id=task_ex.id,
             timeout=self.delay
         )
@@ -423,3 +455,9 @@ def fail_task_if_incomplete(task_ex_id, timeout):
             task_ex_id,
             states.ERROR
         )
+
+
+scheduler.register_callable(
+    'mistral.engine.policies.fail_task_if_incomplete',
+    fail_task_if_incomplete
+)
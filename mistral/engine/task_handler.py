@@ -13,9 +13,6 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import copy
-import operator
-
 from oslo_log import log as logging
 
 from mistral.db.v2 import api as db_api
@@ -28,9 +25,11 @@ from mistral import exceptions as exc
 from mistral import expressions as expr
 from mistral.services import scheduler
 from mistral import utils
+from mistral.utils import cache
 from mistral.utils import wf_trace
 from mistral.workbook import parser as spec_parser
 from mistral.workflow import data_flow
+from mistral.workflow import direct_workflow
 from mistral.workflow import states
 from mistral.workflow import utils as wf_utils
 from mistral.workflow import with_items
@@ -40,6 +39,10 @@ from mistral.workflow import with_items
 
 LOG = logging.getLogger(__name__)
 
+# Evaluated with-items input by task execution id. It's evaluated when
+# a with-items task starts and then reused when next items get started.
+_with_items_inputs = cache.LRUCache(100)
+
 
 def run_existing_task(task_ex_id, reset=True):
     """This function runs existing task execution.
@@ -47,9 +50,9 @@ def run_existing_task(task_ex_id, reset=True):
     It is needed mostly by scheduler.
     """
     task_ex = db_api.get_task_execution(task_ex_id)
-    task_spec = spec_parser.get_task_spec(task_ex.spec)
+    task_spec = spec_parser.get_task_spec(task_ex.spec, validate=False)
     wf_def = db_api.get_workflow_definition(task_ex.workflow_name)
-    wf_spec = spec_parser.get_workflow_spec(wf_def.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_def.spec, validate=False)
 
     # Throw exception if the existing task already succeeded.
     if task_ex.state == states.SUCCESS:
@@ -75,9 +78,15 @@ def run_existing_task(task_ex_id, reset=True):
                 accepted=True
             )
 
+        with_items.on_executions_unaccepted(task_ex, action_exs)
+
         for action_ex in action_exs:
             action_ex.accepted = False
 
+        data_flow.invalidate_task_result_cache(task_ex.id)
+        direct_workflow.invalidate_next_task_names(task_ex)
+        _with_items_inputs.pop(task_ex.id)
+
     # Explicitly change task state to RUNNING.
     task_ex.state = states.RUNNING
     task_ex.processed = False
@@ -85,6 +94,12 @@ def run_existing_task(task_ex_id, reset=True):
     _run_existing_task(task_ex, task_spec, wf_spec)
 
 
+scheduler.register_callable(
+    'mistral.engine.task_handler.run_existing_task',
+    run_existing_task
+)
+
+
 def _run_existing_task(task_ex, task_spec, wf_spec):
     input_dicts = _get_input_dictionaries(
         wf_spec,
@@ -95,8 +110,7 @@ def _run_existing_task(task_ex, task_spec, wf_spec):
 
     # In some cases we can have no input, e.g. in case of 'with-items'.
     if input_dicts:
-        for index, input_d in input_dicts:
-            _run_action_or_workflow(task_ex, task_spec, input_d, index)
+        _run_actions_or_workflows(task_ex, task_spec, list(input_dicts))
     else:
         _schedule_noop_action(task_ex, task_spec)
 
@@ -115,7 +129,7 @@ def run_new_task(wf_cmd):
     """Runs a task."""
     ctx = wf_cmd.ctx
     wf_ex = wf_cmd.wf_ex
-    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
     task_spec = wf_cmd.task_spec
 
     # NOTE(xylan): Need to think how to get rid of this weird judgment to keep
@@ -178,7 +192,7 @@ def on_action_complete(action_ex, result):
     if not isinstance(action_ex, models.WorkflowExecution):
         action_handler.store_action_result(action_ex, result)
 
-    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
     task_spec = wf_spec.get_tasks()[task_ex.name]
 
     task_state = states.SUCCESS if result.is_success() else states.ERROR
@@ -186,7 +200,9 @@ def on_action_complete(action_ex, result):
     if not task_spec.get_with_items():
         _complete_task(task_ex, task_spec, task_state)
     else:
+        with_items.on_action_complete(task_ex, action_ex)
         with_items.increase_capacity(task_ex)
+
         if with_items.is_completed(task_ex):
             _complete_task(
                 task_ex,
@@ -214,6 +230,8 @@ def _create_task_execution(wf_ex, task_spec, ctx, state=states.RUNNING):
     # state within the current session.
     wf_ex.task_executions.append(task_ex)
 
+    data_flow.add_task_execution_to_index(wf_ex, task_ex)
+
     return task_ex
 
 
@@ -223,9 +241,18 @@ def before_task_start(task_ex, task_spec, wf_spec):
 
 
 def after_task_complete(task_ex, task_spec, wf_spec):
-    for p in policies.build_policies(task_spec.get_policies(), wf_spec):
+    task_policies = policies.build_policies(task_spec.get_policies(), wf_spec)
+
+    for p in task_policies:
         p.after_task_complete(task_ex, task_spec)
 
+    # Policies may delay completion (e.g. to retry the task) in which
+    # case scheduled calls like the timeout check are still needed.
+    if states.is_completed(task_ex.state):
+        policies.cancel_obsolete_calls(task_ex, task_policies)
+
+        _with_items_inputs.pop(task_ex.id)
+
 
 def _get_input_dictionaries(wf_spec, task_ex, task_spec, ctx):
     """Calculates a collection of inputs for task action/workflow.
@@ -240,7 +267,15 @@ def _get_input_dictionaries(wf_spec, task_ex, task_spec, ctx):
     and the corresponding input dict.
     """
     # TODO(rakhmerov): Think how to get rid of this.
-    ctx = data_flow.extract_task_result_proxies_to_context(ctx)
+    ctx = data_flow.extract_task_result_proxies_to_context(
+        ctx,
+        task_ex.workflow_execution
+    )
+
+    data_flow.add_workflow_invariants_to_context(
+        task_ex.workflow_execution,
+        ctx
+    )
 
     if not task_spec.get_with_items():
         input_dict = _get_workflow_or_action_input(
@@ -290,50 +325,48 @@ def _get_with_items_input(wf_spec, task_ex, task_spec, ctx):
         {'itemX': 2, 'itemY': 'b'}
       ]
 
+    Input is calculated only for the items that are going to be run now
+    rather than for all of them. With-items expressions are evaluated
+    once and then reused while the task runs.
+
     :return: the list of tuples containing indexes
     and the corresponding input dict.
     """
-    with_items_inputs = expr.evaluate_recursively(
-        task_spec.get_with_items(), ctx
-    )
-
-    with_items.validate_input(with_items_inputs)
-
-    inputs_per_item = []
+    with_items_inputs = _with_items_inputs.get(task_ex.id)
 
-    for key, value in with_items_inputs.items():
-        for index, item in enumerate(value):
-            iter_context = {key: item}
-
-            if index >= len(inputs_per_item):
-                inputs_per_item.append(iter_context)
-            else:
-                inputs_per_item[index].update(iter_context)
+    if with_items_inputs is None:
+        with_items_inputs = expr.evaluate_recursively(
+            task_spec.get_with_items(), ctx
+        )
 
-    action_inputs = []
+        with_items.validate_input(with_items_inputs)
 
-    for item_input in inputs_per_item:
-        new_ctx = utils.merge_dicts(item_input, ctx)
+        _with_items_inputs.put(task_ex.id, with_items_inputs)
 
-        action_inputs.append(_get_workflow_or_action_input(
-            wf_spec, task_ex, task_spec, new_ctx
-        ))
-
-    with_items.prepare_runtime_context(task_ex, task_spec, action_inputs)
+    with_items.prepare_runtime_context(
+        task_ex,
+        task_spec,
+        with_items.get_items_count(with_items_inputs)
+    )
 
     indices = with_items.get_indices_for_loop(task_ex)
     with_items.decrease_capacity(task_ex, len(indices))
+    with_items.on_executions_started(task_ex, len(indices))
 
-    if indices:
-        current_inputs = operator.itemgetter(*indices)(action_inputs)
+    action_inputs = []
 
-        return zip(
-            indices,
-            current_inputs if isinstance(current_inputs, tuple)
-            else [current_inputs]
+    for index in indices:
+        new_ctx = utils.cow_merge_dicts(
+            with_items.get_item_input(with_items_inputs, index),
+            ctx
         )
 
-    return []
+        action_inputs.append((
+            index,
+            _get_workflow_or_action_input(wf_spec, task_ex, task_spec, new_ctx)
+        ))
+
+    return action_inputs
 
 
 def _get_action_input(wf_spec, task_ex, task_spec, ctx):
@@ -359,7 +392,7 @@ def _get_workflow_input(task_spec, ctx):
     return expr.evaluate_recursively(task_spec.get_input(), ctx)
 
 
-def _run_action_or_workflow(task_ex, task_spec, input_dict, index):
+def _run_actions_or_workflows(task_ex, task_spec, indexed_inputs):
     t_name = task_ex.name
 
     if task_spec.get_action_name():
@@ -369,25 +402,34 @@ def _run_action_or_workflow(task_ex, task_spec, input_dict, index):
             (t_name, task_spec.get_action_name())
         )
 
-        _schedule_run_action(task_ex, task_spec, input_dict, index)
+        _schedule_run_actions(task_ex, task_spec, indexed_inputs)
     elif task_spec.get_workflow_name():
         wf_trace.info(
             task_ex,
             "Task '%s' is RUNNING [workflow_name = %s]" %
             (t_name, task_spec.get_workflow_name()))
 
-        _schedule_run_workflow(task_ex, task_spec, input_dict, index)
+        _schedule_run_workflows(task_ex, task_spec, indexed_inputs)
 
 
 def _get_action_defaults(task_ex, task_spec):
-    actions = task_ex.in_context.get('__env', {}).get('__actions', {})
+    wf_ctx = task_ex.workflow_execution.context or {}
+
+    actions = wf_ctx.get('__env', {}).get('__actions', {})
 
     return actions.get(task_spec.get_action_name(), {})
 
 
-def _schedule_run_action(task_ex, task_spec, action_input, index):
+def _schedule_run_actions(task_ex, task_spec, indexed_inputs):
+    """Schedules running task actions with the given inputs.
+
+    All action executions and delayed calls are written to DB at once
+    which matters for 'with-items' tasks with lots of items.
+
+    :param indexed_inputs: List of tuples (index, action_input).
+    """
     wf_ex = task_ex.workflow_execution
-    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
 
     action_spec_name = task_spec.get_action_name()
 
@@ -397,30 +439,40 @@ def _schedule_run_action(task_ex, task_spec, action_input, index):
         wf_spec
     )
 
-    action_ex = action_handler.create_action_execution(
-        action_def, action_input, task_ex, index
+    action_exs = action_handler.create_action_executions(
+        action_def,
+        indexed_inputs,
+        task_ex
     )
 
-    target = expr.evaluate_recursively(
-        task_spec.get_target(),
-        utils.merge_dicts(
-            copy.deepcopy(action_input),
-            copy.copy(task_ex.in_context)
+    method_args_list = []
+
+    for action_ex, (_, action_input) in zip(action_exs, indexed_inputs):
+        target = expr.evaluate_recursively(
+            task_spec.get_target(),
+            data_flow.add_workflow_invariants_to_context(
+                wf_ex,
+                utils.cow_merge_dicts(action_input, task_ex.in_context)
+            )
         )
-    )
 
-    scheduler.schedule_call(
+        method_args_list.append({
+            'action_ex_id': action_ex.id,
+            'target': target
+        })
+
+    scheduler.schedule_calls(
         None,
         'mistral.engine.action_handler.run_existing_action',
         0,
-        action_ex_id=action_ex.id,
-        target=target
+        method_args_list,
+        execution_id=task_ex.workflow_execution_id
     )
 
 
 def _schedule_noop_action(task_ex, task_spec):
     wf_ex = task_ex.workflow_execution
-    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
 
     action_def = action_handler.resolve_action_definition(
         'std.noop',
@@ -432,21 +484,29 @@ def _schedule_noop_action(task_ex, task_spec):
 
     target = expr.evaluate_recursively(
         task_spec.get_target(),
-        task_ex.in_context
+        data_flow.get_task_expression_context(task_ex)
     )
 
     scheduler.schedule_call(
         None,
         'mistral.engine.action_handler.run_existing_action',
         0,
+        execution_id=task_ex.workflow_execution_id,
         action_ex_id=action_ex.id,
         target=target
     )
 
 
-def _schedule_run_workflow(task_ex, task_spec, wf_input, index):
+def _schedule_run_workflows(task_ex, task_spec, indexed_inputs):
+    """Schedules running task subworkflows with the given inputs.
+
+    :param indexed_inputs: List of tuples (index, wf_input).
+    """
     parent_wf_ex = task_ex.workflow_execution
-    parent_wf_spec = spec_parser.get_workflow_spec(parent_wf_ex.spec)
+    parent_wf_spec = spec_parser.get_workflow_spec(
+        parent_wf_ex.spec,
+        validate=False
+    )
 
     wf_spec_name = task_spec.get_workflow_name()
 
@@ -456,28 +516,36 @@ def _schedule_run_workflow(task_ex, task_spec, wf_input, index):
         wf_spec_name
     )
 
-    wf_spec = spec_parser.get_workflow_spec(wf_def.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_def.spec, validate=False)
 
-    wf_params = {
-        'task_execution_id': task_ex.id,
-        'with_items_index': index
-    }
+    method_args_list = []
 
-    if 'env' in parent_wf_ex.params:
-        wf_params['env'] = parent_wf_ex.params['env']
+    for index, wf_input in indexed_inputs:
+        wf_params = {
+            'task_execution_id': task_ex.id,
+            'with_items_index': index
+        }
 
-    for k, v in wf_input.items():
-        if k not in wf_spec.get_input():
-            wf_params[k] = v
-            del wf_input[k]
+        if 'env' in parent_wf_ex.params:
+            wf_params['env'] = parent_wf_ex.params['env']
 
-    scheduler.schedule_call(
+        for k, v in wf_input.items():
+            if k not in wf_spec.get_input():
+                wf_params[k] = v
+                del wf_input[k]
+
+        method_args_list.append({
+            'wf_name': wf_def.name,
+            'wf_input': wf_input,
+            'wf_params': wf_params
+        })
+
+    scheduler.schedule_calls(
         None,
         'mistral.engine.task_handler.run_workflow',
         0,
-        wf_name=wf_def.name,
-        wf_input=wf_input,
-        wf_params=wf_params
+        method_args_list,
+        execution_id=parent_wf_ex.id
     )
 
 
@@ -490,6 +558,12 @@ def run_workflow(wf_name, wf_input, wf_params):
     )
 
 
+scheduler.register_callable(
+    'mistral.engine.task_handler.run_workflow',
+    run_workflow
+)
+
+
 def _complete_task(task_ex, task_spec, state):
     # Ignore if task already completed.
     if states.is_completed(task_ex.state):
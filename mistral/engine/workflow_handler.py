@@ -26,7 +26,7 @@ from mistral.workflow import utils as wf_utils
 def succeed_workflow(wf_ex, final_context, state_info=None):
     set_execution_state(wf_ex, states.SUCCESS, state_info)
 
-    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+    wf_spec = spec_parser.get_workflow_spec(wf_ex.spec, validate=False)
 
     wf_ex.output = data_flow.evaluate_workflow_output(wf_spec, final_context)
 
@@ -53,6 +53,7 @@ def _schedule_send_result_to_parent_workflow(wf_ex):
         None,
         'mistral.engine.workflow_handler.send_result_to_parent_workflow',
         0,
+        execution_id=wf_ex.id,
         wf_ex_id=wf_ex.id
     )
 
@@ -74,6 +75,12 @@ def send_result_to_parent_workflow(wf_ex_id):
         )
 
 
+scheduler.register_callable(
+    'mistral.engine.workflow_handler.send_result_to_parent_workflow',
+    send_result_to_parent_workflow
+)
+
+
 def set_execution_state(wf_ex, state, state_info=None):
     cur_state = wf_ex.state
 
@@ -95,3 +102,6 @@ def set_execution_state(wf_ex, state, state_info=None):
     # Workflow result should be accepted by parent workflows (if any)
     # only if it completed successfully.
     wf_ex.accepted = wf_ex.state == states.SUCCESS
+
+    if wf_ex.task_execution_id:
+        data_flow.invalidate_task_result_cache(wf_ex.task_execution_id)
@@ -18,18 +18,176 @@ import copy
 import inspect
 import re
 
+from oslo_config import cfg
 from oslo_log import log as logging
 import six
 from yaql.language import exceptions as yaql_exc
 from yaql.language import factory
+from yaql.language import utils as yaql_lang_utils
 
 from mistral import exceptions as exc
+from mistral.utils import cache
 from mistral.utils import yaql_utils
 
 
 LOG = logging.getLogger(__name__)
 YAQL_ENGINE = factory.YaqlFactory().create()
 
+CONF = cfg.CONF
+CONF.import_opt('yaql_cache_size', 'mistral.config', group='engine')
+
+# Parsed YAQL expressions keyed by expression text. Parsed expressions
+# don't keep any evaluation state so they can be safely shared.
+_YAQL_CACHE = None
+
+# Inline expression templates keyed by the original string.
+_TEMPLATE_CACHE = None
+
+# Simple path expressions (like '$.a.b[0]') compiled into tuples of keys
+# and indexes. Value False means that expression isn't a simple path.
+_PATH_CACHE = None
+
+_SIMPLE_PATH_PTRN = re.compile(
+    r'^\s*\$((?:\.[A-Za-z_]\w*|\[\s*-?\d+\s*\])*)\s*$'
+)
+_PATH_ELEMENT_PTRN = re.compile(r'\.([A-Za-z_]\w*)|\[\s*(-?\d+)\s*\]')
+
+# Names that YAQL treats as literals rather than dictionary keys.
+_YAQL_LITERALS = ('true', 'false', 'null')
+
+_NOT_RESOLVED = object()
+
+
+def _get_yaql_cache():
+    global _YAQL_CACHE
+
+    if _YAQL_CACHE is None:
+        _YAQL_CACHE = cache.LRUCache(CONF.engine.yaql_cache_size)
+
+    return _YAQL_CACHE
+
+
+def _get_template_cache():
+    global _TEMPLATE_CACHE
+
+    if _TEMPLATE_CACHE is None:
+        _TEMPLATE_CACHE = cache.LRUCache(CONF.engine.yaql_cache_size)
+
+    return _TEMPLATE_CACHE
+
+
+def _get_path_cache():
+    global _PATH_CACHE
+
+    if _PATH_CACHE is None:
+        _PATH_CACHE = cache.LRUCache(CONF.engine.yaql_cache_size)
+
+    return _PATH_CACHE
+
+
+def _parse_yaql(expression):
+    if not isinstance(expression, six.string_types):
+        # Let YAQL engine report a proper error.
+        return YAQL_ENGINE(expression)
+
+    yaql_cache = _get_yaql_cache()
+
+    parsed = yaql_cache.get(expression)
+
+    if parsed is None:
+        parsed = YAQL_ENGINE(expression)
+
+        yaql_cache.put(expression, parsed)
+
+    return parsed
+
+
+def _compile_path(expression):
+    match = _SIMPLE_PATH_PTRN.match(expression)
+
+    if not match:
+        return False
+
+    path = tuple(
+        key if key else int(idx)
+        for key, idx in _PATH_ELEMENT_PTRN.findall(match.group(1))
+    )
+
+    if any(elem in _YAQL_LITERALS for elem in path):
+        return False
+
+    # Some names (e.g. keywords) are not valid in YAQL. Expressions using
+    # them must fail the same way as if they were evaluated by YAQL.
+    try:
+        _parse_yaql(expression)
+    except (yaql_exc.YaqlException, KeyError, ValueError, TypeError):
+        return False
+
+    return path
+
+
+def get_simple_path(expression):
+    """Returns expression path if it's a simple path expression.
+
+    Simple path expression is a lookup of dictionary keys and list indexes
+    in the data context, e.g. '$.server.addresses.private[0]'. Such
+    expressions can be resolved without YAQL.
+
+    :param expression: YAQL expression string.
+    :return: Tuple of keys and indexes or None if the expression is not
+        a simple path.
+    """
+    if not isinstance(expression, six.string_types):
+        return None
+
+    path_cache = _get_path_cache()
+
+    path = path_cache.get(expression)
+
+    if path is None:
+        path = _compile_path(expression)
+
+        path_cache.put(expression, path)
+
+    return path if path is not False else None
+
+
+def _resolve_path(path, data_context):
+    """Resolves simple path against data context.
+
+    Only unambiguous lookups (existing dictionary keys and list indexes
+    within range) are resolved. In all other cases _NOT_RESOLVED is
+    returned so that YAQL can apply its own semantics.
+    """
+    val = data_context
+
+    for elem in path:
+        if isinstance(elem, six.string_types):
+            if not isinstance(val, dict) or elem not in val:
+                return _NOT_RESOLVED
+        elif (not isinstance(val, (list, tuple)) or
+                not -len(val) <= elem < len(val)):
+            return _NOT_RESOLVED
+
+        val = val[elem]
+
+    # YAQL returns copies of containers converting tuples into lists.
+    return yaql_lang_utils.convert_output_data(val, lambda x: x, YAQL_ENGINE)
+
+
+def get_yaql_cache_stats():
+    return _get_yaql_cache().get_stats()
+
+
+def get_template_cache_stats():
+    return _get_template_cache().get_stats()
+
+
+def clear_yaql_cache():
+    _get_yaql_cache().clear()
+    _get_template_cache().clear()
+    _get_path_cache().clear()
+
 
 class Evaluator(object):
     """Expression evaluator interface.
@@ -76,17 +234,36 @@ class YAQLEvaluator(Evaluator):
         LOG.debug("Validating YAQL expression [expression='%s']", expression)
 
         try:
-            YAQL_ENGINE(expression)
+            _parse_yaql(expression)
         except (yaql_exc.YaqlException, KeyError, ValueError, TypeError) as e:
             raise exc.YaqlEvaluationException(e.message)
 
     @classmethod
     def evaluate(cls, expression, data_context):
-        LOG.debug("Evaluating YAQL expression [expression='%s', context=%s]"
-                  % (expression, data_context))
+        LOG.debug(
+            "Evaluating YAQL expression [expression='%s', context=%s]",
+            expression,
+            data_context
+        )
+
+        path = get_simple_path(expression)
 
+        result = (
+            _resolve_path(path, data_context) if path is not None
+            else _NOT_RESOLVED
+        )
+
+        if result is _NOT_RESOLVED:
+            result = cls._evaluate_yaql(expression, data_context)
+
+        LOG.debug("YAQL expression result: %s", result)
+
+        return result if not inspect.isgenerator(result) else list(result)
+
+    @staticmethod
+    def _evaluate_yaql(expression, data_context):
         try:
-            result = YAQL_ENGINE(expression).evaluate(
+            return _parse_yaql(expression).evaluate(
                 context=yaql_utils.get_yaql_context(data_context)
             )
         except (yaql_exc.YaqlException, KeyError, ValueError, TypeError) as e:
@@ -95,10 +272,6 @@ class YAQLEvaluator(Evaluator):
                 " %s" % (expression, data_context, str(e))
             )
 
-        LOG.debug("YAQL expression result: %s" % result)
-
-        return result if not inspect.isgenerator(result) else list(result)
-
     @classmethod
     def is_expression(cls, s):
         # TODO(rakhmerov): It should be generalized since it may not be YAQL.
@@ -109,6 +282,25 @@ class YAQLEvaluator(Evaluator):
 INLINE_YAQL_REGEXP = '<%.*?%>'
 
 
+class InlineTemplate(object):
+    """String with inline YAQL expressions split into segments.
+
+    Segments are tuples (text, is_expression) where text is either a
+    literal or a YAQL expression with '<%' and '%>' delimiters removed.
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.expressions = [txt for txt, is_expr in segments if is_expr]
+
+    def has_expressions(self):
+        return bool(self.expressions)
+
+    def is_single_expression(self):
+        """True if the whole string is one expression without literals."""
+        return len(self.segments) == 1 and self.segments[0][1]
+
+
 class InlineYAQLEvaluator(YAQLEvaluator):
     # This regular expression will look for multiple occurrences of YAQL
     # expressions in '<% %>' (i.e. <% any_symbols %>) within a string.
@@ -123,33 +315,33 @@ class InlineYAQLEvaluator(YAQLEvaluator):
             raise exc.YaqlEvaluationException("Unsupported type '%s'." %
                                               type(expression))
 
-        found_expressions = cls.find_inline_expressions(expression)
-
-        if found_expressions:
-            [super(InlineYAQLEvaluator, cls).validate(expr.strip("<%>"))
-             for expr in found_expressions]
+        for expr in cls.get_template(expression).expressions:
+            super(InlineYAQLEvaluator, cls).validate(expr)
 
     @classmethod
     def evaluate(cls, expression, data_context):
         LOG.debug(
-            "Evaluating inline YAQL expression [expression='%s', context=%s]"
-            % (expression, data_context)
+            "Evaluating inline YAQL expression [expression='%s', context=%s]",
+            expression,
+            data_context
         )
 
-        result = expression
-        found_expressions = cls.find_inline_expressions(expression)
+        template = cls.get_template(expression)
+
+        if not template.has_expressions():
+            return expression
 
-        if found_expressions:
-            for expr in found_expressions:
-                trim_expr = expr.strip("<%>")
-                evaluated = super(InlineYAQLEvaluator,
-                                  cls).evaluate(trim_expr, data_context)
-                if len(expression) == len(expr):
-                    result = evaluated
-                else:
-                    result = result.replace(expr, str(evaluated))
+        yaql_evaluate = super(InlineYAQLEvaluator, cls).evaluate
 
-        LOG.debug("Inline YAQL expression result: %s" % result)
+        if template.is_single_expression():
+            result = yaql_evaluate(template.expressions[0], data_context)
+        else:
+            result = ''.join(
+                str(yaql_evaluate(txt, data_context)) if is_expr else txt
+                for txt, is_expr in template.segments
+            )
+
+        LOG.debug("Inline YAQL expression result: %s", result)
 
         return result
 
@@ -161,6 +353,42 @@ class InlineYAQLEvaluator(YAQLEvaluator):
     def find_inline_expressions(cls, s):
         return cls.find_expression_pattern.findall(s)
 
+    @classmethod
+    def get_template(cls, s):
+        """Returns a compiled template of the given string.
+
+        Templates are cached so a string is scanned for inline expressions
+        only once, including strings that don't contain any expressions.
+        """
+        template_cache = _get_template_cache()
+
+        template = template_cache.get(s)
+
+        if template is None:
+            template = cls._compile_template(s)
+
+            template_cache.put(s, template)
+
+        return template
+
+    @classmethod
+    def _compile_template(cls, s):
+        segments = []
+        pos = 0
+
+        for match in cls.find_expression_pattern.finditer(s):
+            if match.start() > pos:
+                segments.append((s[pos:match.start()], False))
+
+            segments.append((match.group().strip("<%>"), True))
+
+            pos = match.end()
+
+        if pos < len(s):
+            segments.append((s[pos:], False))
+
+        return InlineTemplate(segments)
+
 
 # TODO(rakhmerov): Make it configurable.
 _EVALUATOR = InlineYAQLEvaluator
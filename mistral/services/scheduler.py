@@ -13,30 +13,141 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
 import copy
 import datetime
+import hashlib
+import heapq
+import json
 
+import eventlet
+from eventlet import queue
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_service import periodic_task
 from oslo_service import threadgroup
 from oslo_utils import importutils
+from oslo_utils import timeutils
 
 from mistral import context
 from mistral.db.v2 import api as db_api
 from mistral import exceptions as exc
+from mistral import utils
+from mistral.utils import cache
 
 
 LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
+CONF.import_opt('delayed_call_claim_batch_size', 'mistral.config',
+                group='engine')
+CONF.import_opt('delayed_call_lease_time', 'mistral.config', group='engine')
+CONF.import_opt('delayed_call_pool_size', 'mistral.config', group='engine')
 
 # {scheduler_instance: thread_group}
 _schedulers = {}
 
+# Tuples (call_id, execution_id, call) of delayed calls that need to be
+# made right away. Call is set if it's already claimed by this process.
+_ready_calls = queue.LightQueue()
+
+# Tuples (execution_time, call_id, execution_id) of delayed calls that
+# need to be made later and haven't been added to timers yet.
+_new_timers = queue.LightQueue()
+
+# Pool of green threads making delayed calls concurrently. If it's not
+# set calls are made one by one.
+_pool = None
+
+# {execution_id: deque of (call_id, call) tuples} for workflow executions
+# which calls are currently being made by the dispatcher.
+_execution_calls = {}
+
+# {path: callable} of callables registered in process.
+_registered_callables = {}
+
+# {path: (module, attribute_name)} of resolved callable paths. Attributes
+# are looked up on every call so that replacing them (e.g. by mocks in
+# tests) takes effect.
+_resolved_paths = {}
+
+_call_stats = {
+    'count': 0,
+    'total_delay': 0.0,
+    'max_delay': 0.0,
+    'total_duration': 0.0,
+    'max_duration': 0.0
+}
+
+# Whether calls get dispatched by this process as soon as they're due.
+# If so, scheduling them must be committed first.
+_dispatch_enabled = False
+
+# When calls are dispatched by timers polling is needed only to pick up
+# calls which processes that scheduled them failed to make.
+_RECOVERY_POLL_INTERVAL = 10
+
+# Timers get loaded from DB only for delayed calls due within this time
+# (in seconds). Later calls get loaded by next polls.
+_TIMER_LOAD_WINDOW = 2 * _RECOVERY_POLL_INTERVAL
+
+# Time until which timers of delayed calls persisted in DB are loaded.
+_timers_loaded_until = None
+
+# Owner of leases on delayed calls claimed by this process.
+_LEASE_OWNER = utils.get_process_identifier()
+
+_AUTH_CONTEXT_IDS = 'delayed_call_auth_context_ids'
+
+# Stored security contexts don't change so they can be cached by id.
+_auth_contexts = cache.LRUCache(100)
+
+# Stored security contexts which aren't used by delayed calls anymore get
+# deleted once they haven't been used for this time (in seconds). It must
+# be much longer than the interval contexts get marked as used at (an
+# hour) plus the time any transaction scheduling delayed calls lasts.
+_AUTH_CONTEXT_TTL = 24 * 3600
+
+
+def register_callable(path, func):
+    """Registers an in-process callable under the given path.
+
+    Delayed calls referring to the path (as a factory method, target
+    method or serializer) use the callable directly without importing it.
+    """
+    _registered_callables[path] = func
+
+
+def _resolve_callable(path):
+    func = _registered_callables.get(path)
+
+    if func is not None:
+        return func
+
+    resolved = _resolved_paths.get(path)
+
+    if not resolved:
+        mod_str, _, attr_str = path.rpartition('.')
+
+        try:
+            module = importutils.import_module(mod_str)
+        except (ImportError, ValueError) as e:
+            raise ImportError("Cannot import class %s: %s" % (path, e))
+
+        if not hasattr(module, attr_str):
+            raise ImportError(
+                "Cannot import class %s: module %s has no attribute %s"
+                % (path, mod_str, attr_str)
+            )
+
+        resolved = _resolved_paths[path] = (module, attr_str)
+
+    return getattr(*resolved)
+
 
 def schedule_call(factory_method_path, target_method_name,
-                  run_after, serializers=None, **method_args):
+                  run_after, serializers=None, execution_id=None,
+                  key=None, **method_args):
     """Add this call specification to DB, and then after run_after
     seconds service CallScheduler invokes the target_method.
 
@@ -51,137 +162,502 @@ def schedule_call(factory_method_path, target_method_name,
       { "result": "mistral.utils.serializer.ResultSerializer"}
       Serializer for the object type must implement serializer interface
        in mistral/utils/serializer.py
+    :param execution_id: Id of workflow execution the call belongs to.
+     Calls belonging to the same workflow execution are made in the order
+     they're due, others may be made concurrently.
+    :param key: Key the call can be cancelled by until it's made.
     :param method_args: Target method keyword arguments.
     """
-    ctx = context.ctx().to_dict() if context.has_ctx() else {}
+    schedule_calls(
+        factory_method_path,
+        target_method_name,
+        run_after,
+        [method_args],
+        serializers=serializers,
+        execution_id=execution_id,
+        key=key
+    )
+
+
+def schedule_calls(factory_method_path, target_method_name, run_after,
+                   method_args_list, serializers=None, execution_id=None,
+                   key=None):
+    """Schedules calls of the same target method with different arguments.
+
+    Calls get stored by a few batched statements rather than one by one.
+    Parameters are the same as for schedule_call except method_args_list
+    which is a list of target method keyword arguments, one per call.
+    """
+    # Make sure the calls can be made before storing them.
+    _resolve_callable(factory_method_path or target_method_name)
 
     execution_time = (datetime.datetime.now() +
                       datetime.timedelta(seconds=run_after))
 
+    auth_context_id = _store_auth_context()
+
+    serializer_objs = {}
+
     if serializers:
         for arg_name, serializer_path in serializers.items():
+            serializer_objs[arg_name] = _resolve_callable(serializer_path)()
+
+    values_list = []
+
+    for method_args in method_args_list:
+        method_args = dict(method_args)
+
+        for arg_name, serializer in serializer_objs.items():
             if arg_name not in method_args:
                 raise exc.MistralException(
                     "Serializable method argument %s"
                     " not found in method_args=%s"
                     % (arg_name, method_args))
-            try:
-                serializer = importutils.import_class(serializer_path)()
-            except ImportError as e:
-                raise ImportError("Cannot import class %s: %s"
-                                  % (serializer_path, e))
 
             method_args[arg_name] = serializer.serialize(
                 method_args[arg_name]
             )
 
-    values = {
-        'factory_method_path': factory_method_path,
-        'target_method_name': target_method_name,
-        'execution_time': execution_time,
-        'auth_context': ctx,
-        'serializers': serializers,
-        'method_arguments': method_args,
-        'processing': False
+        values_list.append({
+            'id': utils.generate_unicode_uuid(),
+            'factory_method_path': factory_method_path,
+            'target_method_name': target_method_name,
+            'execution_time': execution_time,
+            'auth_context_id': auth_context_id,
+            'serializers': serializers,
+            'method_arguments': method_args,
+            'processing': False,
+            'execution_id': execution_id,
+            'key': key
+        })
+
+    db_api.create_delayed_calls(values_list)
+
+    # Calls that must run right away don't need to wait for the next
+    # scheduler poll. They get dispatched as soon as the changes made
+    # along with scheduling them are committed. The DB record serves as
+    # a fallback in case the process dies before the call is made.
+    if not _dispatch_enabled:
+        return
+
+    for values in values_list:
+        if run_after <= 0:
+            db_api.add_after_commit_callback(
+                _ready_calls.put,
+                (values['id'], execution_id, None)
+            )
+        else:
+            db_api.add_after_commit_callback(
+                _new_timers.put,
+                (execution_time, values['id'], execution_id)
+            )
+
+
+def cancel_calls(keys):
+    """Cancels delayed calls scheduled with the given keys.
+
+    Calls that are already being made don't get cancelled.
+    """
+    db_api.delete_delayed_calls_by_keys(keys)
+
+
+def _store_auth_context():
+    """Stores current security context and returns its id.
+
+    Contexts are stored once and shared by all delayed calls scheduled
+    with them since they're big (e.g. contain a service catalog).
+    """
+    if not context.has_ctx():
+        return None
+
+    ctx = context.ctx()
+
+    # {context: context_id} of contexts stored within the transaction.
+    tx_cache = db_api.get_transaction_cache()
+    ctx_ids = (
+        tx_cache.setdefault(_AUTH_CONTEXT_IDS, {})
+        if tx_cache is not None else {}
+    )
+
+    ctx_id = ctx_ids.get(ctx)
+
+    if not ctx_id:
+        auth_ctx = ctx.to_dict()
+
+        ctx_id = hashlib.sha256(
+            json.dumps(auth_ctx, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        db_api.ensure_delayed_call_context(ctx_id, auth_ctx)
+
+        ctx_ids[ctx] = ctx_id
+
+    return ctx_id
+
+
+def _get_auth_context(call):
+    # Calls scheduled before contexts were stored separately keep them.
+    if not call.auth_context_id:
+        return call.auth_context
+
+    auth_ctx = _auth_contexts.get(call.auth_context_id)
+
+    if auth_ctx is None:
+        auth_ctx = db_api.get_delayed_call_context(
+            call.auth_context_id
+        ).auth_context
+
+        _auth_contexts.put(call.auth_context_id, auth_ctx)
+
+    return auth_ctx
+
+
+def _run_timers():
+    """Moves delayed calls to the queue of ready calls once they're due.
+
+    The thread sleeps until the nearest call is due or a new call
+    gets scheduled. Timers are kept in a binary heap since only calls
+    due soon are loaded from DB, so there aren't many of them.
+    """
+    timers = []
+
+    while True:
+        now = datetime.datetime.now()
+
+        while timers and timers[0][0] <= now:
+            _, call_id, execution_id = heapq.heappop(timers)
+
+            _ready_calls.put((call_id, execution_id, None))
+
+        timeout = (
+            (timers[0][0] - now).total_seconds() if timers else None
+        )
+
+        try:
+            heapq.heappush(timers, _new_timers.get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+
+def _load_timers():
+    """Adds timers for delayed calls persisted in DB that are due soon.
+
+    It makes calls scheduled before the process (re)started or by other
+    processes get made in time without waiting for polling. Only calls
+    due within a limited time window are loaded at once, calls due later
+    get loaded by next polls.
+    """
+    global _timers_loaded_until
+
+    load_until = datetime.datetime.now() + datetime.timedelta(
+        seconds=_TIMER_LOAD_WINDOW
+    )
+    limit = CONF.engine.delayed_call_claim_batch_size
+
+    with db_api.transaction():
+        calls = db_api.get_delayed_calls_to_start(
+            load_until,
+            start_time=_timers_loaded_until,
+            limit=limit
+        )
+
+    for call in calls:
+        _new_timers.put((call.execution_time, call.id, call.execution_id))
+
+    # Calls beyond the limit get loaded by next polls.
+    if limit and len(calls) >= limit:
+        load_until = calls[-1].execution_time
+
+    _timers_loaded_until = load_until
+
+
+def _dispatch_ready_calls():
+    """Makes ready calls on the pool of green threads.
+
+    Calls of a workflow execution are queued up while its previous call
+    is being made and then made by the same green thread one by one.
+    """
+    while True:
+        call_id, execution_id, call = _ready_calls.get()
+
+        calls = _execution_calls.get(execution_id)
+
+        if calls is not None:
+            calls.append((call_id, call))
+
+            continue
+
+        calls = collections.deque([(call_id, call)])
+
+        if execution_id:
+            _execution_calls[execution_id] = calls
+
+        _pool.spawn_n(_run_calls_now, execution_id, calls)
+
+
+def _run_calls_now(execution_id, calls):
+    try:
+        while calls:
+            call_id, call = calls.popleft()
+
+            try:
+                if call:
+                    # The call is claimed already by polling.
+                    _make_calls([call])
+                else:
+                    _run_call_now(call_id)
+            except Exception as e:
+                LOG.exception(
+                    "Failed to make delayed call [id=%s, exception=%s]",
+                    call_id, e
+                )
+    finally:
+        _execution_calls.pop(execution_id, None)
+
+
+def _run_call_now(call_id):
+    # Claim the call in a short transaction of its own. The claim locks
+    # the row so if the lock was held while the call is made, claims of
+    # other nodes would wait for it and the target method couldn't cancel
+    # delayed calls (e.g. the engine cancels policy calls of a task once
+    # the task completes) without deadlocking. If this process dies
+    # before deleting the call it's made by another node once the lease
+    # expires.
+    with db_api.transaction():
+        call, number_of_updated = db_api.update_delayed_call(
+            id=call_id,
+            values={
+                'processing': True,
+                'lease_owner': _LEASE_OWNER,
+                'lease_expiry': _get_lease_expiry()
+            },
+            query_filter={'processing': False}
+        )
+
+        # The periodic scheduler has already picked up the call.
+        if number_of_updated != 1:
+            return
+
+        # Load the call while it's bound to the session.
+        call = db_api.get_delayed_call(call_id)
+
+    LOG.debug('Processing delayed call after commit: %s', call)
+
+    _make_leased_call(call)
+
+
+def _make_leased_call(call):
+    """Makes a call claimed by this process and then deletes it.
+
+    The call gets deleted even if the target method fails. It isn't
+    deleted if it's no longer leased to this process, i.e. if the lease
+    has expired and another process has claimed the call.
+    """
+    # Transaction is needed here because some of the
+    # target_method can use the DB.
+    with db_api.transaction():
+        _make_call(call)
+
+    try:
+        with db_api.transaction():
+            db_api.delete_delayed_calls([call.id], _LEASE_OWNER)
+    except Exception as e:
+        LOG.error(
+            "Failed to delete call [call=%s, exception=%s]", call, e
+        )
+
+
+def _make_call(call):
+    started = datetime.datetime.now()
+
+    try:
+        target_method, method_args = _prepare_call(call)
+
+        target_method(**method_args)
+    except Exception as e:
+        LOG.error("Delayed call failed [exception=%s]", e)
+
+    _update_call_stats(call, started)
+
+
+def _make_calls(calls):
+    """Makes claimed calls one by one deleting each once it's made.
+
+    Calls whose lease expires before they're started are left to be
+    claimed again since another process may be making them already.
+    """
+    for call in calls:
+        if call.lease_expiry <= datetime.datetime.now():
+            LOG.warning(
+                "Lease on delayed call has expired before it was made"
+                " [id=%s]", call.id
+            )
+
+            continue
+
+        _make_leased_call(call)
+
+
+def _update_call_stats(call, started):
+    delay = max((started - call.execution_time).total_seconds(), 0.0)
+    duration = (datetime.datetime.now() - started).total_seconds()
+
+    LOG.debug(
+        "Delayed call made [id=%s, delay=%.3fs, duration=%.3fs]",
+        call.id, delay, duration
+    )
+
+    _call_stats['count'] += 1
+    _call_stats['total_delay'] += delay
+    _call_stats['max_delay'] = max(_call_stats['max_delay'], delay)
+    _call_stats['total_duration'] += duration
+    _call_stats['max_duration'] = max(_call_stats['max_duration'], duration)
+
+
+def get_call_stats():
+    """Returns latency statistics of delayed calls made by the process.
+
+    Delay is the time between when a call is due and when it starts,
+    duration is the time the target method takes. Both are in seconds.
+    """
+    count = _call_stats['count']
+
+    return {
+        'count': count,
+        'avg_delay': _call_stats['total_delay'] / count if count else 0.0,
+        'max_delay': _call_stats['max_delay'],
+        'avg_duration': (
+            _call_stats['total_duration'] / count if count else 0.0
+        ),
+        'max_duration': _call_stats['max_duration']
     }
 
-    db_api.create_delayed_call(values)
+
+def reset_call_stats():
+    for k in _call_stats:
+        _call_stats[k] = 0 if k == 'count' else 0.0
+
+
+def _get_lease_expiry():
+    return datetime.datetime.now() + datetime.timedelta(
+        seconds=CONF.engine.delayed_call_lease_time
+    )
+
+
+def _prepare_call(call):
+    """Returns target method and its arguments for the given call.
+
+    It also sets the security context the call was scheduled with.
+    """
+    context.set_ctx(context.MistralContext(_get_auth_context(call)))
+
+    if call.factory_method_path:
+        factory = _resolve_callable(call.factory_method_path)
+
+        target_method = getattr(factory(), call.target_method_name)
+    else:
+        target_method = _resolve_callable(call.target_method_name)
+
+    method_args = copy.copy(call.method_arguments)
+
+    if call.serializers:
+        # Deserialize arguments.
+        for arg_name, ser_path in call.serializers.items():
+            serializer = _resolve_callable(ser_path)()
+
+            deserialized = serializer.deserialize(method_args[arg_name])
+
+            method_args[arg_name] = deserialized
+
+    return target_method, method_args
 
 
 class CallScheduler(periodic_task.PeriodicTasks):
+    def __init__(self, conf):
+        super(CallScheduler, self).__init__(conf)
+
+        self._last_poll_time = None
+
+    def _is_poll_needed(self):
+        if not _dispatch_enabled:
+            return True
+
+        now = datetime.datetime.now()
+
+        if (self._last_poll_time and
+                (now - self._last_poll_time).total_seconds() <
+                _RECOVERY_POLL_INTERVAL):
+            return False
+
+        self._last_poll_time = now
+
+        return True
+
     # TODO(rakhmerov): Think how to make 'spacing' configurable.
     @periodic_task.periodic_task(spacing=1, run_immediately=True)
     def run_delayed_calls(self, ctx=None):
-        time_filter = datetime.datetime.now() + datetime.timedelta(
-            seconds=1)
-
-        # Wrap delayed calls processing in transaction to
-        # guarantee that calls will be processed just once.
-        # Do delete query to DB first to force hanging up all
-        # parallel transactions.
+        if not self._is_poll_needed():
+            return
+
+        if _dispatch_enabled:
+            _load_timers()
+
+            # Calls that aren't overdue yet are going to be made by
+            # timers right when they're due.
+            time_filter = datetime.datetime.now()
+        else:
+            time_filter = datetime.datetime.now() + datetime.timedelta(
+                seconds=1)
+
+        # Claim delayed calls in a separate transaction to guarantee
+        # that calls will be processed just once. Claimed rows stay
+        # locked until the transaction commits so parallel transactions
+        # skip them. Claimed calls are leased for a limited time so that
+        # if this process fails to make them other nodes will do that.
         # It should work on isolation level 'READ-COMMITTED',
         # 'REPEATABLE-READ' and above.
         #
         # 'REPEATABLE-READ' is by default in MySQL and
         # 'READ-COMMITTED is by default in PostgreSQL.
-        delayed_calls = []
-
         with db_api.transaction():
-            candidate_calls = db_api.get_delayed_calls_to_start(
-                time_filter
+            calls_to_make = db_api.claim_delayed_calls_to_start(
+                time_filter,
+                _LEASE_OWNER,
+                _get_lease_expiry(),
+                CONF.engine.delayed_call_claim_batch_size
             )
-            calls_to_make = []
-
-            for call in candidate_calls:
-                # Mark this delayed call has been processed in order to
-                # prevent calling from parallel transaction.
-                result, number_of_updated = db_api.update_delayed_call(
-                    id=call.id,
-                    values={'processing': True},
-                    query_filter={"processing": False}
-                )
-
-                # If number_of_updated != 1 other scheduler already
-                # updated.
-                if number_of_updated == 1:
-                    calls_to_make.append(result)
 
         for call in calls_to_make:
             LOG.debug('Processing next delayed call: %s', call)
 
-            context.set_ctx(context.MistralContext(call.auth_context))
-
-            if call.factory_method_path:
-                factory = importutils.import_class(
-                    call.factory_method_path
-                )
-
-                target_method = getattr(factory(), call.target_method_name)
-            else:
-                target_method = importutils.import_class(
-                    call.target_method_name
-                )
+        if not _dispatch_enabled:
+            _make_calls(calls_to_make)
 
-            method_args = copy.copy(call.method_arguments)
+            return
 
-            if call.serializers:
-                # Deserialize arguments.
-                for arg_name, ser_path in call.serializers.items():
-                    serializer = importutils.import_class(ser_path)()
-
-                    deserialized = serializer.deserialize(
-                        method_args[arg_name]
-                    )
-
-                    method_args[arg_name] = deserialized
-
-            delayed_calls.append((target_method, method_args))
+        # Claimed calls are made by the dispatcher too so that calls of
+        # the same workflow execution are always made one by one while
+        # calls of different executions are made concurrently.
+        for call in calls_to_make:
+            _ready_calls.put((call.id, call.execution_id, call))
 
-        for (target_method, method_args) in delayed_calls:
-            # Transaction is needed here because some of the
-            # target_method can use the DB
-            with db_api.transaction():
-                try:
-                    # Call the method.
-                    target_method(**method_args)
-                except Exception as e:
-                    LOG.error(
-                        "Delayed call failed [exception=%s]", e
-                    )
+    @periodic_task.periodic_task(spacing=3600)
+    def delete_unused_auth_contexts(self, ctx=None):
+        # Context timestamps are in UTC.
+        used_before = timeutils.utcnow() - datetime.timedelta(
+            seconds=_AUTH_CONTEXT_TTL
+        )
 
         with db_api.transaction():
-            for call in calls_to_make:
-                try:
-                    # Delete calls that were processed.
-                    db_api.delete_delayed_call(call.id)
-                except Exception as e:
-                    LOG.error(
-                        "failed to delete call [call=%s, "
-                        "exception=%s]", call, e
-                    )
+            count = db_api.delete_unused_delayed_call_contexts(used_before)
+
+        LOG.debug("Deleted unused delayed call contexts: %s", count)
 
 
 def setup():
+    global _dispatch_enabled
+    global _pool
+
     tg = threadgroup.ThreadGroup()
 
     scheduler = CallScheduler(CONF)
@@ -193,12 +669,45 @@ def setup():
         context=None
     )
 
+    # SQLite is used only for testing and all sessions share one
+    # connection there so transactions of concurrent threads interfere.
+    # Calls are made only by polling and one by one in this case.
+    if db_api.get_driver_name() != 'sqlite':
+        _pool = eventlet.GreenPool(CONF.engine.delayed_call_pool_size)
+
+        tg.add_thread(_dispatch_ready_calls)
+        tg.add_thread(_run_timers)
+
+        _dispatch_enabled = True
+
+        _load_timers()
+
     _schedulers[scheduler] = tg
 
     return tg
 
 
 def stop_all_schedulers():
+    global _dispatch_enabled
+    global _pool
+    global _timers_loaded_until
+
     for scheduler, tg in _schedulers.items():
         tg.stop()
         del _schedulers[scheduler]
+
+    # Calls being made by the pool are left to other nodes (or to this
+    # one once it's set up again) when their leases expire.
+    if _pool:
+        for gt in list(_pool.coroutines_running):
+            eventlet.kill(gt)
+
+    for q in (_ready_calls, _new_timers):
+        while not q.empty():
+            q.get_nowait()
+
+    _execution_calls.clear()
+
+    _timers_loaded_until = None
+    _dispatch_enabled = False
+    _pool = None
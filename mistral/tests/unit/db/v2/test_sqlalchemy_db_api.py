@@ -19,6 +19,7 @@ import copy
 import datetime
 
 from oslo_config import cfg
+from oslo_utils import timeutils
 
 from mistral import context as auth_context
 from mistral.db.v2.sqlalchemy import api as db_api
@@ -561,6 +562,23 @@ class ActionExecutionTest(SQLAlchemyTest):
 
         self.assertIsNone(db_api.load_action_execution("not-existing-id"))
 
+    def test_create_action_executions(self):
+        values_list = []
+
+        for i, values in enumerate(ACTION_EXECS):
+            values = copy.deepcopy(values)
+            values['id'] = 'a_ex%s' % i
+
+            values_list.append(values)
+
+        with db_api.transaction():
+            created = db_api.create_action_executions(values_list)
+
+        self.assertEqual(['a_ex0', 'a_ex1'], [a_ex.id for a_ex in created])
+
+        for a_ex in created:
+            self.assertEqual(a_ex, db_api.get_action_execution(a_ex.id))
+
     def test_update_action_execution(self):
         created = db_api.create_action_execution(ACTION_EXECS[0])
 
@@ -1309,6 +1327,211 @@ class EnvironmentTest(SQLAlchemyTest):
         self.assertIn("'name': 'env1'", s)
 
 
+def _create_delayed_call(delay):
+    return db_api.create_delayed_call({
+        'factory_method_path': None,
+        'target_method_name': 'my_module.my_method',
+        'execution_time': (
+            datetime.datetime.now() + datetime.timedelta(seconds=delay)
+        ),
+        'auth_context': {},
+        'serializers': None,
+        'method_arguments': {},
+        'processing': False
+    })
+
+
+class DelayedCallTest(SQLAlchemyTest):
+    def _claim_delayed_calls(self, owner, lease_time=60, limit=None):
+        now = datetime.datetime.now()
+
+        with db_api.transaction():
+            return db_api.claim_delayed_calls_to_start(
+                now,
+                owner,
+                now + datetime.timedelta(seconds=lease_time),
+                limit
+            )
+
+    def test_claim_delayed_calls_to_start(self):
+        call1 = _create_delayed_call(-2)
+        call2 = _create_delayed_call(-1)
+        call3 = _create_delayed_call(60)
+
+        claimed = self._claim_delayed_calls('node1', limit=1)
+
+        self.assertEqual([call1.id], [c.id for c in claimed])
+        self.assertTrue(claimed[0].processing)
+        self.assertEqual('node1', claimed[0].lease_owner)
+
+        claimed = self._claim_delayed_calls('node2')
+
+        self.assertEqual([call2.id], [c.id for c in claimed])
+
+        for call, owner in ((call1, 'node1'), (call2, 'node2')):
+            fetched = db_api.get_delayed_call(call.id)
+
+            self.assertTrue(fetched.processing)
+            self.assertEqual(owner, fetched.lease_owner)
+
+        self.assertFalse(db_api.get_delayed_call(call3.id).processing)
+
+        self.assertEqual([], self._claim_delayed_calls('node3'))
+
+    def test_claim_delayed_calls_with_expired_lease(self):
+        call = _create_delayed_call(-1)
+
+        self.assertEqual(1, len(self._claim_delayed_calls('node1', -1)))
+
+        claimed = self._claim_delayed_calls('node2')
+
+        self.assertEqual([call.id], [c.id for c in claimed])
+        self.assertEqual('node2', db_api.get_delayed_call(call.id).lease_owner)
+
+        # Lease of 'node2' hasn't expired yet.
+        self.assertEqual([], self._claim_delayed_calls('node3'))
+
+    def test_delete_delayed_calls(self):
+        call1 = _create_delayed_call(0)
+        call2 = _create_delayed_call(0)
+        call3 = _create_delayed_call(0)
+
+        self.assertEqual(2, db_api.delete_delayed_calls([call1.id, call2.id]))
+        self.assertEqual(0, db_api.delete_delayed_calls([]))
+
+        self.assertRaises(
+            exc.NotFoundException,
+            db_api.get_delayed_call,
+            call1.id
+        )
+        self.assertIsNotNone(db_api.get_delayed_call(call3.id))
+
+    def test_delete_delayed_calls_of_lease_owner(self):
+        call1 = _create_delayed_call(-2)
+        call2 = _create_delayed_call(-1)
+
+        self._claim_delayed_calls('node1', limit=1)
+        self._claim_delayed_calls('node2')
+
+        ids = [call1.id, call2.id]
+
+        self.assertEqual(0, db_api.delete_delayed_calls(ids, 'node3'))
+        self.assertEqual(1, db_api.delete_delayed_calls(ids, 'node1'))
+
+        self.assertRaises(
+            exc.NotFoundException,
+            db_api.get_delayed_call,
+            call1.id
+        )
+        self.assertEqual(
+            'node2',
+            db_api.get_delayed_call(call2.id).lease_owner
+        )
+
+    def test_create_delayed_calls(self):
+        values_list = [
+            {
+                'id': 'call%s' % i,
+                'target_method_name': 'my_module.my_method',
+                'execution_time': datetime.datetime.now(),
+                'method_arguments': {'index': i}
+            }
+            for i in range(3)
+        ]
+
+        db_api.create_delayed_calls(values_list)
+
+        for i in range(3):
+            call = db_api.get_delayed_call('call%s' % i)
+
+            self.assertDictEqual({'index': i}, call.method_arguments)
+            self.assertFalse(call.processing)
+            self.assertIsNotNone(call.created_at)
+
+    def test_delete_delayed_calls_by_keys(self):
+        call1 = _create_delayed_call(0)
+        call2 = _create_delayed_call(0)
+        call3 = _create_delayed_call(0)
+
+        db_api.update_delayed_call(call1.id, {'key': 'key1'})
+        db_api.update_delayed_call(
+            call2.id,
+            {'key': 'key2', 'processing': True}
+        )
+
+        self.assertEqual(
+            1,
+            db_api.delete_delayed_calls_by_keys(['key1', 'key2', 'key3'])
+        )
+        self.assertEqual(0, db_api.delete_delayed_calls_by_keys([]))
+
+        self.assertRaises(
+            exc.NotFoundException,
+            db_api.get_delayed_call,
+            call1.id
+        )
+
+        # Calls being made can't be cancelled.
+        self.assertIsNotNone(db_api.get_delayed_call(call2.id))
+        self.assertIsNotNone(db_api.get_delayed_call(call3.id))
+
+    def test_ensure_delayed_call_context(self):
+        with db_api.transaction():
+            db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+            db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+
+        ctx = db_api.get_delayed_call_context('ctx1')
+
+        self.assertDictEqual({'user_id': '1'}, ctx.auth_context)
+
+    def test_delete_unused_delayed_call_contexts(self):
+        db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+        db_api.ensure_delayed_call_context('ctx2', {'user_id': '2'})
+
+        call = _create_delayed_call(0)
+
+        db_api.update_delayed_call(call.id, {'auth_context_id': 'ctx1'})
+
+        db_api.delete_unused_delayed_call_contexts(
+            datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        )
+
+        self.assertIsNotNone(db_api.get_delayed_call_context('ctx1'))
+        self.assertRaises(
+            exc.NotFoundException,
+            db_api.get_delayed_call_context,
+            'ctx2'
+        )
+
+    def test_reused_delayed_call_context_not_deleted(self):
+        db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+        db_api.ensure_delayed_call_context('ctx2', {'user_id': '2'})
+
+        used_before = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=1
+        )
+
+        # Contexts used recently don't get marked as used again.
+        db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+
+        self.assertIsNone(db_api.get_delayed_call_context('ctx1').updated_at)
+
+        timeutils.set_time_override(
+            used_before + datetime.timedelta(hours=2)
+        )
+
+        self.addCleanup(timeutils.clear_time_override)
+
+        # The context gets used again by a call that isn't stored yet.
+        db_api.ensure_delayed_call_context('ctx1', {'user_id': '1'})
+
+        self.assertEqual(1, db_api.delete_unused_delayed_call_contexts(
+            used_before
+        ))
+
+        self.assertIsNotNone(db_api.get_delayed_call_context('ctx1'))
+
+
 class TXTest(SQLAlchemyTest):
     def test_rollback(self):
         db_api.start_tx()
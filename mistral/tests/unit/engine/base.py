@@ -14,6 +14,7 @@
 #    limitations under the License.
 
 import eventlet
+import mock
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
@@ -67,6 +68,11 @@ def launch_executor_server(transport, executor):
 
 
 class EngineTestCase(base.DbTestCase):
+    # If True, delayed calls are dispatched right after commit and made
+    # by timers on a pool of green threads like it happens with DBs
+    # other than SQLite.
+    dispatch_delayed_calls = False
+
     def setUp(self):
         super(EngineTestCase, self).setUp()
 
@@ -99,10 +105,18 @@ class EngineTestCase(base.DbTestCase):
         self.addOnException(self.print_workflow_executions)
 
         # Start scheduler.
-        scheduler_thread_group = scheduler.setup()
-
-        self.addCleanup(self.kill_threads)
-        self.addCleanup(scheduler_thread_group.stop)
+        if self.dispatch_delayed_calls:
+            with mock.patch.object(db_api, 'get_driver_name',
+                                   mock.MagicMock(return_value='mysql')):
+                scheduler.setup()
+
+            self.addCleanup(self.kill_threads)
+            self.addCleanup(scheduler.stop_all_schedulers)
+        else:
+            scheduler_thread_group = scheduler.setup()
+
+            self.addCleanup(self.kill_threads)
+            self.addCleanup(scheduler_thread_group.stop)
 
     def kill_threads(self):
         LOG.info("Finishing engine and executor threads...")
@@ -13,6 +13,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import mock
 from oslo_config import cfg
 from oslo_log import log as logging
 
@@ -85,6 +86,244 @@ class DataFlowEngineTest(engine_test_base.EngineTestCase):
             task3.published
         )
 
+    def test_workflow_invariants_not_stored_in_tasks(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          tasks:
+            task1:
+              action: std.echo output=<% execution().id %>
+              publish:
+                exec_id: <% $.task1 %>
+                env_var: <% env().from %>
+              on-success:
+                - task2
+
+            task2:
+              publish:
+                exec_id2: <% execution().id %>
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wf', {}, env={'from': 'Neo'})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+
+        self.assertIn('__execution', wf_ex.context)
+        self.assertIn('__env', wf_ex.context)
+
+        tasks = wf_ex.task_executions
+
+        task1 = self._assert_single_item(tasks, name='task1')
+        task2 = self._assert_single_item(tasks, name='task2')
+
+        self.assertDictEqual(
+            {'exec_id': wf_ex.id, 'env_var': 'Neo'},
+            task1.published
+        )
+        self.assertDictEqual({'exec_id2': wf_ex.id}, task2.published)
+
+        for t_ex in tasks:
+            for key in data_flow.WORKFLOW_INVARIANT_KEYS:
+                self.assertNotIn(key, t_ex.in_context)
+
+    def test_task_execution_index(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          tasks:
+            task1:
+              action: std.echo output="Hi"
+              on-success:
+                - task2
+
+            task2:
+              action: std.echo output="Morpheus"
+              on-success:
+                - task3
+
+            task3:
+              publish:
+                result: "<% $.task1 %>, <% $.task2 %>!"
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wf', {})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+
+        tasks = wf_ex.task_executions
+
+        task3 = self._assert_single_item(tasks, name='task3')
+
+        self.assertDictEqual({'result': 'Hi, Morpheus!'}, task3.published)
+
+        self.assertDictEqual(
+            {t_ex.name: t_ex.id for t_ex in tasks},
+            data_flow.get_task_execution_index(wf_ex)
+        )
+
+        task2 = self._assert_single_item(tasks, name='task2')
+
+        # Contexts keep only direct upstream tasks.
+        self.assertDictEqual(
+            {'task2': task2.id},
+            task3.in_context['__upstream_tasks']
+        )
+
+        for t_ex in tasks:
+            self.assertNotIn('__tasks', t_ex.in_context)
+
+    def test_published_variable_not_shadowed_by_unrelated_task(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          tasks:
+            task1:
+              action: std.echo output="Hi"
+              publish:
+                task3: "published"
+              on-success:
+                - task2
+
+            task2:
+              action: std.echo output="Morpheus"
+              publish:
+                result: "<% $.task3 %>, <% $.task1 %>"
+
+            task3:
+              action: std.echo output="Unrelated"
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wf', {})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+
+        tasks = wf_ex.task_executions
+
+        task2 = self._assert_single_item(tasks, name='task2')
+
+        self.assertDictEqual({'result': 'published, Hi'}, task2.published)
+
+    def test_upstream_task_result_overrides_variable(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          input:
+            - task1
+
+          tasks:
+            task1:
+              action: std.echo output="Hi"
+              on-success:
+                - task2
+
+            task2:
+              action: std.echo output="Morpheus"
+              publish:
+                direct: <% $.task1 %>
+                task1: "published"
+              on-success:
+                - task3
+
+            task3:
+              publish:
+                transitive: <% $.task1 %>
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wf', {'task1': 'input'})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+
+        tasks = wf_ex.task_executions
+
+        task2 = self._assert_single_item(tasks, name='task2')
+        task3 = self._assert_single_item(tasks, name='task3')
+
+        self.assertDictEqual(
+            {'direct': 'Hi', 'task1': 'published'},
+            task2.published
+        )
+        self.assertDictEqual({'transitive': 'Hi'}, task3.published)
+
+    def test_task_results_in_cycle(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          tasks:
+            task0:
+              publish:
+                count: 0
+              on-success:
+                - task1
+
+            task1:
+              action: std.echo output=<% $.count + 1 %>
+              publish:
+                count: <% $.task1 %>
+              on-success:
+                - task2
+
+            task2:
+              action: std.echo output="Hi"
+              on-success:
+                - task3
+
+            task3:
+              publish:
+                seen: <% $.task1 %>
+              on-success:
+                - task1: <% $.count < 3 %>
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wf', {})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+
+        task3_execs = self._assert_multiple_items(
+            wf_ex.task_executions,
+            3,
+            name='task3'
+        )
+
+        self.assertListEqual(
+            [1, 2, 3],
+            sorted(t_ex.published['seen'] for t_ex in task3_execs)
+        )
+
     def test_linear_with_branches_dataflow(self):
         linear_with_branches_wf = """---
         version: '2.0'
@@ -495,3 +734,73 @@ class DataFlowTest(test_base.BaseTest):
         ))
 
         self.assertEqual([1, 1], data_flow.get_task_execution_result(task_ex))
+
+
+class TaskResultCacheTest(test_base.DbTestCase):
+    def setUp(self):
+        super(TaskResultCacheTest, self).setUp()
+
+        wf_ex = db_api.create_workflow_execution({
+            'name': 'wf',
+            'spec': {},
+            'state': states.RUNNING
+        })
+
+        self.task_ex = db_api.create_task_execution({
+            'name': 'task1',
+            'spec': {'version': '2.0', 'name': 'task1', 'type': 'direct'},
+            'state': states.RUNNING,
+            'workflow_execution_id': wf_ex.id
+        })
+
+        self.action_ex = db_api.create_action_execution({
+            'name': 'std.echo',
+            'state': states.SUCCESS,
+            'output': {'result': 'Hi'},
+            'accepted': True,
+            'runtime_context': {},
+            'task_execution_id': self.task_ex.id
+        })
+
+    @mock.patch.object(
+        db_api,
+        'get_task_execution',
+        mock.MagicMock(side_effect=db_api.get_task_execution)
+    )
+    def test_result_cached_within_transaction(self):
+        proxy = data_flow.TaskResultProxy(self.task_ex.id)
+
+        with db_api.transaction():
+            self.assertEqual('Hi', proxy.get())
+            self.assertEqual('Hi', proxy.get())
+            self.assertEqual(
+                'Hi',
+                data_flow.ProxyAwareDict({'task1': proxy})['task1']
+            )
+
+        self.assertEqual(1, db_api.get_task_execution.call_count)
+
+        with db_api.transaction():
+            self.assertEqual('Hi', proxy.get())
+
+        self.assertEqual(2, db_api.get_task_execution.call_count)
+
+    def test_result_cache_invalidation(self):
+        proxy = data_flow.TaskResultProxy(self.task_ex.id)
+
+        with db_api.transaction():
+            self.assertEqual('Hi', proxy.get())
+
+            task_ex = db_api.get_task_execution(self.task_ex.id)
+
+            data_flow.invalidate_task_execution_result(task_ex)
+
+            self.assertEqual([], proxy.get())
+
+    def test_no_cache_without_transaction(self):
+        self.assertIsNone(db_api.get_transaction_cache())
+
+        with db_api.transaction():
+            self.assertEqual({}, db_api.get_transaction_cache())
+
+        self.assertIsNone(db_api.get_transaction_cache())
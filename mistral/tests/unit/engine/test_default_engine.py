@@ -136,7 +136,7 @@ class DefaultEngineTest(base.DbTestCase):
 
         # Data Flow properties.
         self._assert_dict_contains_subset(wf_input, task_ex.in_context)
-        self.assertIn('__execution', task_ex.in_context)
+        self.assertNotIn('__execution', task_ex.in_context)
 
         action_execs = db_api.get_action_executions(
             task_execution_id=task_ex.id
@@ -179,7 +179,7 @@ class DefaultEngineTest(base.DbTestCase):
 
         # Data Flow properties.
         self._assert_dict_contains_subset(wf_input, task_ex.in_context)
-        self.assertIn('__execution', task_ex.in_context)
+        self.assertNotIn('__execution', task_ex.in_context)
 
         action_execs = db_api.get_action_executions(
             task_execution_id=task_ex.id
@@ -293,7 +293,7 @@ class DefaultEngineTest(base.DbTestCase):
         self.assertIsNotNone(task1_ex.spec)
         self.assertDictEqual({}, task1_ex.runtime_context)
         self._assert_dict_contains_subset(wf_input, task1_ex.in_context)
-        self.assertIn('__execution', task1_ex.in_context)
+        self.assertNotIn('__execution', task1_ex.in_context)
 
         action_execs = db_api.get_action_executions(
             task_execution_id=task1_ex.id
@@ -320,7 +320,7 @@ class DefaultEngineTest(base.DbTestCase):
         task1_ex = db_api.get_task_execution(task1_ex.id)  # Re-read the state.
 
         self._assert_dict_contains_subset(wf_input, task1_ex.in_context)
-        self.assertIn('__execution', task1_ex.in_context)
+        self.assertNotIn('__execution', task1_ex.in_context)
         self.assertDictEqual({'var': 'Hey'}, task1_ex.published)
         self.assertDictEqual({'output': 'Hey'}, task1_action_ex.input)
         self.assertDictEqual({'result': 'Hey'}, task1_action_ex.output)
@@ -366,8 +366,8 @@ class DefaultEngineTest(base.DbTestCase):
         self.assertEqual(states.SUCCESS, task2_action_ex.state)
 
         # Data Flow properties.
-        self.assertIn('__tasks', task2_ex.in_context)
-        self.assertIn('__execution', task1_ex.in_context)
+        self.assertNotIn('__tasks', task2_ex.in_context)
+        self.assertNotIn('__execution', task1_ex.in_context)
         self.assertDictEqual({'output': 'Hi'}, task2_action_ex.input)
         self.assertDictEqual({}, task2_ex.published)
         self.assertDictEqual({'output': 'Hi'}, task2_action_ex.input)
@@ -81,7 +81,10 @@ class JavaScriptEngineTest(base.EngineTestCase):
         task_ex = wf_ex.task_executions[0]
 
         self.assertEqual(states.SUCCESS, task_ex.state)
-        self.assertDictEqual({}, task_ex.runtime_context)
+        self.assertDictEqual(
+            {'next_task_names': {'state': states.SUCCESS, 'names': []}},
+            task_ex.runtime_context
+        )
 
         self.assertEqual(500, task_ex.published['num_10_times'])
         self.assertEqual(100, task_ex.published['result'])
@@ -100,6 +103,9 @@ class JavaScriptEngineTest(base.EngineTestCase):
         task_ex = wf_ex.task_executions[0]
 
         self.assertEqual(states.SUCCESS, task_ex.state)
-        self.assertDictEqual({}, task_ex.runtime_context)
+        self.assertDictEqual(
+            {'next_task_names': {'state': states.SUCCESS, 'names': []}},
+            task_ex.runtime_context
+        )
 
         self.assertEqual(500, task_ex.published['result'])
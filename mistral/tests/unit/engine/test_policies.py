@@ -12,6 +12,8 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import datetime
+
 import mock
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -20,6 +22,7 @@ from mistral.actions import std_actions
 from mistral.db.v2 import api as db_api
 from mistral.engine import policies
 from mistral import exceptions as exc
+from mistral.services import scheduler
 from mistral.services import workbooks as wb_service
 from mistral.services import workflows as wf_service
 from mistral.tests.unit.engine import base
@@ -191,6 +194,39 @@ workflows:
 """
 
 
+TIMEOUT_WB3 = """
+---
+version: '2.0'
+name: wb
+workflows:
+  wf1:
+    type: direct
+
+    tasks:
+      task1:
+        action: std.echo output="Hi!"
+        timeout: 60
+"""
+
+
+TIMEOUT_WB4 = """
+---
+version: '2.0'
+name: wb
+workflows:
+  wf1:
+    type: direct
+
+    tasks:
+      task1:
+        action: std.fail
+        timeout: 60
+        retry:
+          count: 2
+          delay: 3
+"""
+
+
 PAUSE_BEFORE_WB = """
 ---
 version: '2.0'
@@ -286,7 +322,12 @@ class PoliciesTest(base.EngineTestCase):
                 "delay": {"type": "integer"}
             }
         }
-        task_db = type('Task', (object,), {'in_context': {'int_var': 5}})
+        wf_ex = type('Execution', (object,), {'context': {}})
+        task_db = type(
+            'Task',
+            (object,),
+            {'in_context': {'int_var': 5}, 'workflow_execution': wf_ex}
+        )
         policy.delay = "<% $.int_var %>"
 
         # Validation is ok.
@@ -523,9 +564,9 @@ class PoliciesTest(base.EngineTestCase):
         )
 
     @mock.patch.object(
-        std_actions.EchoAction, 'run', mock.Mock(side_effect=[1, 2, 3, 4])
+        std_actions.EchoAction, 'run', side_effect=[1, 2, 3, 4]
     )
-    def test_retry_continue_on(self):
+    def test_retry_continue_on(self, mock_run):
         retry_wb = """---
         version: '2.0'
 
@@ -680,9 +721,9 @@ class PoliciesTest(base.EngineTestCase):
     @mock.patch.object(
         std_actions.EchoAction,
         'run',
-        mock.Mock(side_effect=[exc.ActionException(), "mocked result"])
+        side_effect=[exc.ActionException(), "mocked result"]
     )
-    def test_retry_policy_succeed_after_failure(self):
+    def test_retry_policy_succeed_after_failure(self, mock_run):
         retry_wb = """---
         version: '2.0'
 
@@ -767,6 +808,67 @@ class PoliciesTest(base.EngineTestCase):
         # Make sure that engine did not create extra tasks.
         self.assertEqual(1, len(tasks_db))
 
+    def test_timeout_check_cancelled_on_task_completion(self):
+        wb_service.create_workbook_v2(TIMEOUT_WB3)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wb.wf1', {})
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+        task_ex = wf_ex.task_executions[0]
+
+        calls = db_api.get_delayed_calls_to_start(datetime.datetime.max)
+
+        self.assertEqual(
+            [],
+            [c for c in calls if c.key == '%s:timeout' % task_ex.id]
+        )
+
+    def test_no_calls_cancelled_for_task_without_policies(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          tasks:
+            task1:
+              action: std.echo output="Hi!"
+        """
+
+        wf_service.create_workflows(wf_text)
+
+        with mock.patch.object(scheduler, 'cancel_calls') as cancel_calls:
+            wf_ex = self.engine.start_workflow('wf', {})
+
+            self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        self.assertFalse(cancel_calls.called)
+
+    def test_timeout_check_not_cancelled_on_task_retry(self):
+        wb_service.create_workbook_v2(TIMEOUT_WB4)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('wb.wf1', {})
+
+        # Note: We need to reread execution to access related tasks.
+        wf_ex = db_api.get_workflow_execution(wf_ex.id)
+        task_ex = wf_ex.task_executions[0]
+
+        def get_timeout_calls():
+            calls = db_api.get_delayed_calls_to_start(datetime.datetime.max)
+
+            return [c for c in calls if c.key == '%s:timeout' % task_ex.id]
+
+        self._await(lambda: self.is_task_delayed(task_ex.id), delay=0.1)
+
+        # The task is going to be retried so it still needs the check.
+        self.assertEqual(1, len(get_timeout_calls()))
+
+        self._await(lambda: self.is_execution_error(wf_ex.id))
+
+        self.assertEqual([], get_timeout_calls())
+
     def test_pause_before_policy(self):
         wb_service.create_workbook_v2(PAUSE_BEFORE_WB)
 
@@ -921,3 +1023,7 @@ class PoliciesTest(base.EngineTestCase):
         wf_ex = db_api.get_execution(wf_ex.id)
 
         self.assertEqual(2, len(wf_ex.task_executions))
+
+
+class PoliciesDispatchTest(PoliciesTest):
+    dispatch_delayed_calls = True
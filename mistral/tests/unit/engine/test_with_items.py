@@ -13,11 +13,13 @@
 #    limitations under the License.
 
 import copy
+import mock
 from oslo_config import cfg
 from oslo_log import log as logging
 
 from mistral.actions import base as action_base
 from mistral.db.v2 import api as db_api
+from mistral.engine import task_handler
 from mistral import exceptions as exc
 from mistral.services import workbooks as wb_service
 from mistral.services import workflows as wf_service
@@ -27,6 +29,7 @@ from mistral import utils
 from mistral.workflow import data_flow
 from mistral.workflow import states
 from mistral.workflow import utils as wf_utils
+from mistral.workflow import with_items
 
 # TODO(nmakhotkin) Need to write more tests.
 
@@ -750,6 +753,69 @@ class WithItemsEngineTest(base.EngineTestCase):
 
         self.assertEqual(states.SUCCESS, task_ex.state)
 
+    def test_with_items_concurrency_input_per_item(self):
+        wf_text = """---
+        version: "2.0"
+
+        concurrency_test:
+          type: direct
+
+          input:
+           - names: ["John", "Ivan", "Mistral", "Hello"]
+
+          tasks:
+            task1:
+              action: std.async_noop
+              with-items: name in <% $.names %>
+              concurrency: 2
+
+        """
+        wf_service.create_workflows(wf_text)
+
+        patcher = mock.patch.object(
+            task_handler,
+            '_get_action_input',
+            wraps=task_handler._get_action_input
+        )
+
+        get_action_input = patcher.start()
+
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(
+            with_items,
+            'validate_input',
+            wraps=with_items.validate_input
+        )
+
+        validate_input = patcher.start()
+
+        self.addCleanup(patcher.stop)
+
+        # Start workflow.
+        wf_ex = self.engine.start_workflow('concurrency_test', {})
+
+        # Input is calculated only for items being started.
+        self.assertEqual(2, get_action_input.call_count)
+
+        wf_ex = db_api.get_execution(wf_ex.id)
+        task_ex = wf_ex.task_executions[0]
+
+        for name in ["John", "Ivan", "Mistral", "Hello"]:
+            self.engine.on_action_complete(
+                self.get_incomplete_action_ex(task_ex).id,
+                wf_utils.Result(name)
+            )
+
+            task_ex = db_api.get_task_execution(task_ex.id)
+
+        self._await(lambda: self.is_execution_success(wf_ex.id))
+
+        self.assertEqual(4, get_action_input.call_count)
+
+        # With-items input is evaluated only when the task starts.
+        self.assertEqual(1, validate_input.call_count)
+
     def test_with_items_concurrency_2_fail(self):
         workflow_with_concurrency_2_fail = """---
         version: "2.0"
@@ -940,3 +1006,7 @@ class WithItemsEngineTest(base.EngineTestCase):
 
         self.assertEqual(12, len(task1.executions))
         self._assert_multiple_items(task1.executions, 4, accepted=True)
+
+
+class WithItemsDispatchTest(WithItemsEngineTest):
+    dispatch_delayed_calls = True
@@ -15,8 +15,11 @@
 
 import datetime
 import eventlet
+from eventlet import queue
 import mock
+from oslo_config import cfg
 
+from mistral import context
 from mistral.db.v2 import api as db_api
 from mistral import exceptions as exc
 from mistral.services import scheduler
@@ -46,10 +49,8 @@ def failed_to_send():
     raise exc.EngineException("Test")
 
 
-def update_call_failed(id, values):
-    return None, 0
-
-MOCK_UPDATE_CALL_FAILED = mock.MagicMock(side_effect=update_call_failed)
+# Simulates that calls have been claimed by another scheduler.
+MOCK_CLAIM_CALLS_FAILED = mock.MagicMock(return_value=[])
 
 
 class SchedulerServiceTest(base.DbTestCase):
@@ -60,6 +61,75 @@ class SchedulerServiceTest(base.DbTestCase):
 
         self.addCleanup(self.thread_group.stop)
 
+    def test_scheduler_with_unknown_target(self):
+        self.assertRaises(
+            ImportError,
+            scheduler.schedule_call,
+            None,
+            'mistral.tests.unit.services.test_scheduler.unknown',
+            DELAY
+        )
+
+        time_filter = datetime.datetime.now() + datetime.timedelta(seconds=2)
+        calls = db_api.get_delayed_calls_to_start(time_filter)
+
+        self.assertEqual(0, len(calls))
+
+    def test_scheduler_with_registered_target(self):
+        method = mock.MagicMock()
+
+        scheduler.register_callable('test.registered_method', method)
+
+        self.addCleanup(
+            scheduler._registered_callables.pop,
+            'test.registered_method'
+        )
+
+        scheduler.schedule_call(
+            None,
+            'test.registered_method',
+            DELAY,
+            name='task',
+            id='321'
+        )
+
+        eventlet.sleep(WAIT)
+
+        method.assert_called_once_with(name='task', id='321')
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_scheduler_stores_auth_context_once(self, method):
+        user_ids = []
+
+        method.side_effect = lambda id: user_ids.append(
+            context.ctx().user_id
+        )
+
+        with db_api.transaction():
+            for i in range(2):
+                scheduler.schedule_call(
+                    None,
+                    TARGET_METHOD_NAME,
+                    DELAY,
+                    id=str(i)
+                )
+
+            calls = db_api.get_delayed_calls_to_start(
+                datetime.datetime.now() + datetime.timedelta(seconds=2)
+            )
+
+            ctx_ids = set(c.auth_context_id for c in calls)
+
+            self.assertEqual(1, len(ctx_ids))
+
+            ctx = db_api.get_delayed_call_context(ctx_ids.pop())
+
+            self.assertDictEqual(self.ctx.to_dict(), ctx.auth_context)
+
+        eventlet.sleep(WAIT)
+
+        self.assertListEqual([self.ctx.user_id] * 2, user_ids)
+
     @mock.patch(FACTORY_METHOD_NAME)
     def test_scheduler_with_factory(self, factory):
         target_method = 'run_something'
@@ -256,7 +326,57 @@ class SchedulerServiceTest(base.DbTestCase):
 
         db_api.delete_delayed_call(call.id)
 
-    @mock.patch.object(db_api, 'update_delayed_call', MOCK_UPDATE_CALL_FAILED)
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_calls_not_made_after_lease_expired(self, method):
+        cfg.CONF.set_override('delayed_call_lease_time', 1, group='engine')
+
+        self.addCleanup(
+            cfg.CONF.clear_override,
+            'delayed_call_lease_time',
+            group='engine'
+        )
+
+        make_call = scheduler._make_call
+        leased = {}
+
+        def _make_call(call):
+            fetched = db_api.get_delayed_call(call.id)
+
+            leased.setdefault(fetched.method_arguments['id'], []).append(
+                fetched.lease_expiry > datetime.datetime.now()
+            )
+
+            make_call(call)
+
+        # The first call of the batch outlives the lease on the batch.
+        method.side_effect = lambda id: eventlet.sleep(1.5 if id == '0' else 0)
+
+        with db_api.transaction():
+            for i in range(3):
+                scheduler.schedule_call(None, TARGET_METHOD_NAME, 0, id=str(i))
+
+        with mock.patch.object(scheduler, '_make_call', _make_call):
+            self._await(lambda: len(leased) == 3, delay=0.1, timeout=WAIT * 2)
+
+        # The rest of the calls got claimed again and made once.
+        self.assertDictEqual(
+            {'0': [True], '1': [True], '2': [True]},
+            leased
+        )
+
+        self._await(
+            lambda: not db_api.get_delayed_calls_to_start(
+                datetime.datetime.max
+            ),
+            delay=0.1,
+            timeout=WAIT
+        )
+
+    @mock.patch.object(
+        db_api,
+        'claim_delayed_calls_to_start',
+        MOCK_CLAIM_CALLS_FAILED
+    )
     def test_scheduler_doesnt_handel_calls_the_failed_on_update(self):
         def stop_thread_groups():
             [tg.stop() for tg in self.tgs]
@@ -283,3 +403,497 @@ class SchedulerServiceTest(base.DbTestCase):
         db_api.get_delayed_call(calls[0].id)
 
         db_api.delete_delayed_call(calls[0].id)
+
+
+class SchedulerDispatchTest(base.DbTestCase):
+    def setUp(self):
+        super(SchedulerDispatchTest, self).setUp()
+
+        self.addCleanup(self._delete_calls)
+
+        # Make sure the calls can't be made by polling.
+        poll_patcher = mock.patch.object(
+            scheduler.CallScheduler,
+            'run_periodic_tasks',
+            mock.MagicMock(return_value=None)
+        )
+        poll_patcher.start()
+
+        self.addCleanup(poll_patcher.stop)
+
+        # Calls are dispatched after commit only for DBs supporting
+        # concurrent transactions.
+        with mock.patch.object(db_api, 'get_driver_name',
+                               mock.MagicMock(return_value='mysql')):
+            scheduler.setup()
+
+        self.addCleanup(scheduler.stop_all_schedulers)
+
+        scheduler.reset_call_stats()
+
+    @staticmethod
+    def _delete_calls():
+        with db_api.transaction():
+            calls = db_api.get_delayed_calls_to_start(datetime.datetime.max)
+
+            db_api.delete_delayed_calls([c.id for c in calls])
+
+    def _get_calls(self):
+        time_filter = datetime.datetime.now() + datetime.timedelta(seconds=1)
+
+        return db_api.get_delayed_calls_to_start(time_filter)
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_call_dispatched_after_commit(self, method):
+        with db_api.transaction():
+            scheduler.schedule_call(
+                None,
+                TARGET_METHOD_NAME,
+                0,
+                name='task',
+                id='321'
+            )
+
+            self.assertFalse(method.called)
+
+        self._await(lambda: method.called, delay=0.1, timeout=WAIT)
+
+        method.assert_called_once_with(name='task', id='321')
+
+        self._await(lambda: not self._get_calls(), delay=0.1, timeout=WAIT)
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_call_made_after_claim(self, method):
+        make_call = scheduler._make_call
+        claims = []
+
+        def _make_call(call):
+            fetched = db_api.get_delayed_call(call.id)
+
+            claims.append((fetched.processing, fetched.lease_owner))
+
+            make_call(call)
+
+        # The call can cancel other calls while it's being made.
+        method.side_effect = lambda id: scheduler.cancel_calls(['key'])
+
+        with mock.patch.object(scheduler, '_make_call', _make_call):
+            with db_api.transaction():
+                scheduler.schedule_call(None, TARGET_METHOD_NAME, 0, id='1')
+                scheduler.schedule_call(
+                    None,
+                    TARGET_METHOD_NAME,
+                    DELAY,
+                    key='key',
+                    id='2'
+                )
+
+            self._await(lambda: method.called, delay=0.1, timeout=WAIT)
+
+            # The cancelled call is never made.
+            eventlet.sleep(DELAY + 0.5)
+
+        method.assert_called_once_with(id='1')
+
+        self.assertListEqual([(True, scheduler._LEASE_OWNER)], claims)
+        self.assertEqual(
+            0,
+            len(db_api.get_delayed_calls_to_start(datetime.datetime.max))
+        )
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_failed_call_deleted(self, method):
+        method.side_effect = exc.EngineException('Test')
+
+        with db_api.transaction():
+            scheduler.schedule_call(None, TARGET_METHOD_NAME, 0, id='1')
+
+        self._await(lambda: method.called, delay=0.1, timeout=WAIT)
+        self._await(
+            lambda: scheduler.get_call_stats()['count'] == 1,
+            delay=0.1,
+            timeout=WAIT
+        )
+
+        eventlet.sleep(0.5)
+
+        self.assertEqual(
+            0,
+            len(db_api.get_delayed_calls_to_start(datetime.datetime.max))
+        )
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_call_not_deleted_after_lease_lost(self, method):
+        make_call = scheduler._make_call
+        call_ids = []
+
+        def _make_call(call):
+            make_call(call)
+
+            # Simulate that the lease expired and another node claimed
+            # the call while it was being made.
+            db_api.update_delayed_call(call.id, {'lease_owner': 'other'})
+
+            call_ids.append(call.id)
+
+        with mock.patch.object(scheduler, '_make_call', _make_call):
+            with db_api.transaction():
+                scheduler.schedule_call(None, TARGET_METHOD_NAME, 0, id='1')
+
+            self._await(lambda: call_ids, delay=0.1, timeout=WAIT)
+
+            eventlet.sleep(0.5)
+
+        method.assert_called_once_with(id='1')
+
+        # The call is left to the node that claimed it.
+        self.assertEqual(
+            'other',
+            db_api.get_delayed_call(call_ids[0]).lease_owner
+        )
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_call_not_dispatched_after_rollback(self, method):
+        db_api.start_tx()
+
+        try:
+            scheduler.schedule_call(None, TARGET_METHOD_NAME, 0, id='321')
+
+            db_api.rollback_tx()
+        finally:
+            db_api.end_tx()
+
+        eventlet.sleep(0.5)
+
+        self.assertFalse(method.called)
+        self.assertEqual(0, len(self._get_calls()))
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_delayed_call_made_by_timer(self, method):
+        with db_api.transaction():
+            scheduler.schedule_call(None, TARGET_METHOD_NAME, DELAY, id='1')
+
+        eventlet.sleep(0.5)
+
+        self.assertFalse(method.called)
+        self.assertEqual(
+            1,
+            len(db_api.get_delayed_calls_to_start(
+                datetime.datetime.now() + datetime.timedelta(seconds=WAIT)
+            ))
+        )
+
+        self._await(lambda: method.called, delay=0.1, timeout=WAIT)
+
+        method.assert_called_once_with(id='1')
+
+        self._await(lambda: not self._get_calls(), delay=0.1, timeout=WAIT)
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_timers_loaded_on_setup(self, method):
+        db_api.create_delayed_call({
+            'factory_method_path': None,
+            'target_method_name': TARGET_METHOD_NAME,
+            'execution_time': (
+                datetime.datetime.now() + datetime.timedelta(seconds=0.5)
+            ),
+            'auth_context': {},
+            'serializers': None,
+            'method_arguments': {'id': '2'},
+            'processing': False
+        })
+
+        # Restart the scheduler.
+        scheduler.stop_all_schedulers()
+
+        with mock.patch.object(db_api, 'get_driver_name',
+                               mock.MagicMock(return_value='mysql')):
+            scheduler.setup()
+
+        self._await(lambda: method.called, delay=0.1, timeout=WAIT)
+
+        method.assert_called_once_with(id='2')
+
+    def _create_call(self, delay, id):
+        return db_api.create_delayed_call({
+            'factory_method_path': None,
+            'target_method_name': TARGET_METHOD_NAME,
+            'execution_time': (
+                datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            ),
+            'auth_context': {},
+            'serializers': None,
+            'method_arguments': {'id': id},
+            'processing': False
+        })
+
+    def _load_timers(self):
+        with mock.patch.object(scheduler._new_timers, 'put') as put:
+            scheduler._load_timers()
+
+        return [args[0][1] for args, _ in put.call_args_list]
+
+    @mock.patch.object(scheduler, '_timers_loaded_until', None)
+    def test_only_calls_due_soon_loaded_into_timers(self):
+        soon = self._create_call(1, '1')
+
+        self._create_call(scheduler._TIMER_LOAD_WINDOW + 3600, '2')
+
+        self.assertListEqual([soon.id], self._load_timers())
+
+        # Calls loaded already don't get loaded again.
+        self.assertListEqual([], self._load_timers())
+
+    @mock.patch.object(scheduler, '_timers_loaded_until', None)
+    def test_calls_beyond_limit_loaded_later(self):
+        cfg.CONF.set_override(
+            'delayed_call_claim_batch_size',
+            2,
+            group='engine'
+        )
+
+        self.addCleanup(
+            cfg.CONF.clear_override,
+            'delayed_call_claim_batch_size',
+            group='engine'
+        )
+
+        calls = [self._create_call(i + 1, str(i)) for i in range(3)]
+
+        self.assertListEqual([c.id for c in calls[:2]], self._load_timers())
+        self.assertIn(calls[2].id, self._load_timers())
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_calls_of_execution_made_in_order(self, method):
+        made_calls = []
+
+        def make_call(id):
+            # Later calls take less time so that they would complete
+            # first if they were made concurrently.
+            eventlet.sleep(0.1 * (3 - int(id)))
+
+            made_calls.append(id)
+
+        method.side_effect = make_call
+
+        with db_api.transaction():
+            for i in range(3):
+                scheduler.schedule_call(
+                    None,
+                    TARGET_METHOD_NAME,
+                    0,
+                    execution_id='123',
+                    id=str(i)
+                )
+
+        self._await(lambda: len(made_calls) == 3, delay=0.1, timeout=WAIT)
+
+        self.assertListEqual(['0', '1', '2'], made_calls)
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_polled_calls_of_execution_made_in_order(self, method):
+        events = []
+
+        def make_call(id):
+            events.append(('start', id))
+
+            eventlet.sleep(0.5 if id == '1' else 0)
+
+            events.append(('end', id))
+
+        method.side_effect = make_call
+
+        with db_api.transaction():
+            scheduler.schedule_call(
+                None,
+                TARGET_METHOD_NAME,
+                0,
+                execution_id='123',
+                id='1'
+            )
+
+        self._await(lambda: events, delay=0.1, timeout=WAIT)
+
+        # A call of the same execution that only polling can pick up,
+        # e.g. because the process that scheduled it has failed.
+        db_api.create_delayed_call({
+            'factory_method_path': None,
+            'target_method_name': TARGET_METHOD_NAME,
+            'execution_time': datetime.datetime.now(),
+            'auth_context': {},
+            'serializers': None,
+            'method_arguments': {'id': '2'},
+            'processing': False,
+            'execution_id': '123'
+        })
+
+        scheduler.CallScheduler(cfg.CONF).run_delayed_calls()
+
+        self._await(lambda: len(events) == 4, delay=0.1, timeout=WAIT)
+
+        self.assertListEqual(
+            [('start', '1'), ('end', '1'), ('start', '2'), ('end', '2')],
+            events
+        )
+
+        self._await(lambda: not self._get_calls(), delay=0.1, timeout=WAIT)
+
+    @mock.patch(TARGET_METHOD_NAME)
+    def test_slow_call_not_holding_up_others(self, method):
+        event = eventlet.event.Event()
+
+        def make_call(id):
+            if id == '1':
+                # Wait until the call of another execution is made.
+                with eventlet.Timeout(WAIT, False):
+                    event.wait()
+            else:
+                event.send()
+
+        method.side_effect = make_call
+
+        with db_api.transaction():
+            scheduler.schedule_call(
+                None,
+                TARGET_METHOD_NAME,
+                0,
+                execution_id='123',
+                id='1'
+            )
+            scheduler.schedule_call(
+                None,
+                TARGET_METHOD_NAME,
+                0,
+                execution_id='456',
+                id='2'
+            )
+
+        self._await(
+            lambda: scheduler.get_call_stats()['count'] == 2,
+            delay=0.1,
+            timeout=WAIT
+        )
+
+        stats = scheduler.get_call_stats()
+
+        # The slow call didn't wait for the whole timeout.
+        self.assertLess(stats['max_duration'], WAIT)
+        self.assertGreaterEqual(stats['max_duration'], stats['avg_duration'])
+
+
+class SchedulerTimersTest(base.DbTestCase):
+    def setUp(self):
+        super(SchedulerTimersTest, self).setUp()
+
+        self.new_timers = queue.LightQueue()
+        self.ready_calls = queue.LightQueue()
+
+        for patcher in (
+            mock.patch.object(scheduler, '_new_timers', self.new_timers),
+            mock.patch.object(scheduler, '_ready_calls', self.ready_calls),
+            mock.patch.object(scheduler, '_timers_loaded_until', None)
+        ):
+            patcher.start()
+
+            self.addCleanup(patcher.stop)
+
+    def _start_timers(self):
+        thread = eventlet.spawn(scheduler._run_timers)
+
+        self.addCleanup(thread.kill)
+
+    def _get_ready_call(self):
+        call_id, _, _ = self.ready_calls.get(timeout=WAIT)
+
+        return call_id, datetime.datetime.now()
+
+    def _create_call(self, delay, processing=False):
+        call = db_api.create_delayed_call({
+            'factory_method_path': None,
+            'target_method_name': TARGET_METHOD_NAME,
+            'execution_time': (
+                datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            ),
+            'auth_context': {},
+            'serializers': None,
+            'method_arguments': {},
+            'processing': processing,
+            'execution_id': '123'
+        })
+
+        self.addCleanup(db_api.delete_delayed_call, call.id)
+
+        return call
+
+    def test_timers_fire_when_due(self):
+        now = datetime.datetime.now()
+
+        due = {
+            'later': now + datetime.timedelta(seconds=0.4),
+            'soon': now + datetime.timedelta(seconds=0.2),
+            'overdue': now - datetime.timedelta(seconds=1)
+        }
+
+        self._start_timers()
+
+        for call_id, execution_time in due.items():
+            self.new_timers.put((execution_time, call_id, None))
+
+        fired = [self._get_ready_call() for _ in range(3)]
+
+        self.assertListEqual(
+            ['overdue', 'soon', 'later'],
+            [call_id for call_id, _ in fired]
+        )
+
+        for call_id, fired_at in fired:
+            self.assertGreaterEqual(fired_at, due[call_id])
+
+    def test_new_timer_wakes_timers_up(self):
+        now = datetime.datetime.now()
+
+        self._start_timers()
+
+        self.new_timers.put((now + datetime.timedelta(hours=1), 'far', None))
+
+        # Let the thread go to sleep until the far timer is due.
+        eventlet.sleep(0.1)
+
+        self.new_timers.put((now, 'near', None))
+
+        self.assertEqual('near', self._get_ready_call()[0])
+        self.assertTrue(self.ready_calls.empty())
+
+    def test_load_timers(self):
+        overdue = self._create_call(-1)
+        soon = self._create_call(1)
+
+        self._create_call(1, processing=True)
+        self._create_call(scheduler._TIMER_LOAD_WINDOW + 3600)
+
+        scheduler._load_timers()
+
+        self.assertListEqual(
+            [
+                (overdue.execution_time, overdue.id, '123'),
+                (soon.execution_time, soon.id, '123')
+            ],
+            [self.new_timers.get_nowait() for _ in range(2)]
+        )
+        self.assertTrue(self.new_timers.empty())
+        self.assertGreater(
+            scheduler._timers_loaded_until,
+            soon.execution_time
+        )
+
+    def test_loaded_timers_fire(self):
+        call = self._create_call(0.2)
+
+        self._start_timers()
+
+        scheduler._load_timers()
+
+        call_id, fired_at = self._get_ready_call()
+
+        self.assertEqual(call.id, call_id)
+        self.assertGreaterEqual(fired_at, call.execution_time)
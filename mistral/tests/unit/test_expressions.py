@@ -13,6 +13,8 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import mock
+
 from mistral import exceptions as exc
 from mistral import expressions as expr
 from mistral.tests import base
@@ -111,6 +113,69 @@ class YaqlEvaluatorTest(base.BaseTest):
                           self._evaluator.validate,
                           {'a': 1})
 
+    def test_parsed_expressions_cached(self):
+        expr.clear_yaql_cache()
+
+        self.addCleanup(expr.clear_yaql_cache)
+
+        self._evaluator.validate('$.server.id.len()')
+
+        res = self._evaluator.evaluate('$.server.id.len()', DATA)
+
+        self.assertEqual(36, res)
+
+        res = self._evaluator.evaluate(
+            '$.server.id.len()',
+            {'server': {'id': 'abc'}}
+        )
+
+        self.assertEqual(3, res)
+
+        stats = expr.get_yaql_cache_stats()
+
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['hits'])
+
+    def test_simple_path(self):
+        self.assertEqual((), expr.get_simple_path('$'))
+        self.assertEqual(('server', 'id'), expr.get_simple_path('$.server.id'))
+        self.assertEqual(
+            ('servers', 0, 'name'),
+            expr.get_simple_path(' $.servers[0].name ')
+        )
+        self.assertIsNone(expr.get_simple_path('$.servers.len()'))
+        self.assertIsNone(expr.get_simple_path("$.server.status = 'OK'"))
+        self.assertIsNone(expr.get_simple_path('$servers'))
+        self.assertIsNone(expr.get_simple_path('$.true'))
+        self.assertIsNone(expr.get_simple_path('$.__env'))
+        self.assertIsNone(expr.get_simple_path('$.server.and'))
+
+    @mock.patch.object(expr.YAQLEvaluator, '_evaluate_yaql')
+    def test_simple_path_without_yaql(self, mock_evaluate_yaql):
+        res = self._evaluator.evaluate('$.servers[-1].name', SERVERS)
+
+        self.assertEqual('fedora', res)
+
+        res = self._evaluator.evaluate('$.servers', SERVERS)
+
+        self.assertEqual(SERVERS['servers'], res)
+        self.assertIsNot(SERVERS['servers'], res)
+
+        self.assertFalse(mock_evaluate_yaql.called)
+
+    def test_simple_path_fallback(self):
+        res = self._evaluator.evaluate('$.servers.name', SERVERS)
+
+        self.assertEqual(['centos', 'ubuntu', 'fedora'], res)
+
+        self.assertRaises(
+            exc.YaqlEvaluationException,
+            self._evaluator.evaluate,
+            '$.server.invalid',
+            DATA
+        )
+
 
 class InlineYAQLEvaluatorTest(base.BaseTest):
     def setUp(self):
@@ -178,6 +243,38 @@ class InlineYAQLEvaluatorTest(base.BaseTest):
                           self._evaluator.validate,
                           {'a': 1})
 
+    def test_template(self):
+        template = self._evaluator.get_template('Hi <% $.name %>!')
+
+        self.assertEqual(
+            [('Hi ', False), (' $.name ', True), ('!', False)],
+            template.segments
+        )
+        self.assertFalse(template.is_single_expression())
+        self.assertTrue(
+            self._evaluator.get_template('<% $.name %>').is_single_expression()
+        )
+
+    def test_template_cached(self):
+        expr.clear_yaql_cache()
+
+        self.addCleanup(expr.clear_yaql_cache)
+
+        s = 'There is no expression.'
+
+        self.assertIs(s, self._evaluator.evaluate(s, DATA))
+        self.assertIs(s, self._evaluator.evaluate(s, DATA))
+
+        self.assertEqual(
+            'Status: OK',
+            self._evaluator.evaluate('Status: <% $.status %>', DATA)
+        )
+
+        stats = expr.get_template_cache_stats()
+
+        self.assertEqual(2, stats['size'])
+        self.assertEqual(1, stats['hits'])
+
 
 class ExpressionsTest(base.BaseTest):
     def test_evaluate_complex_expressions(self):
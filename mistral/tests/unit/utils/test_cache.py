@@ -0,0 +1,79 @@
+# Copyright 2015 - Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+from mistral.tests import base
+from mistral.utils import cache
+
+
+class LRUCacheTest(base.BaseTest):
+    def test_get_put(self):
+        c = cache.LRUCache(2)
+
+        self.assertIsNone(c.get('a'))
+
+        c.put('a', 1)
+
+        self.assertEqual(1, c.get('a'))
+        self.assertIn('a', c)
+        self.assertEqual(1, len(c))
+
+        stats = c.get_stats()
+
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.5, stats['hit_rate'])
+
+    def test_eviction(self):
+        c = cache.LRUCache(2)
+
+        c.put('a', 1)
+        c.put('b', 2)
+
+        # Touch 'a' so that 'b' becomes the least recently used entry.
+        c.get('a')
+
+        c.put('c', 3)
+
+        self.assertIn('a', c)
+        self.assertNotIn('b', c)
+        self.assertIn('c', c)
+        self.assertEqual(1, c.get_stats()['evictions'])
+
+    def test_disabled(self):
+        c = cache.LRUCache(0)
+
+        c.put('a', 1)
+
+        self.assertEqual(0, len(c))
+        self.assertIsNone(c.get('a'))
+
+    def test_pop(self):
+        c = cache.LRUCache(2)
+
+        c.put('a', 1)
+
+        self.assertEqual(1, c.pop('a'))
+        self.assertIsNone(c.pop('a'))
+        self.assertNotIn('a', c)
+
+    def test_clear(self):
+        c = cache.LRUCache(2)
+
+        c.put('a', 1)
+        c.get('a')
+
+        c.clear()
+
+        self.assertEqual(0, len(c))
+        self.assertEqual(0, c.get_stats()['hits'])
@@ -83,6 +83,34 @@ class UtilsTest(base.BaseTest):
 
         self.assertDictEqual(left, expected)
 
+    def test_cow_merge_dicts(self):
+        left = copy.deepcopy(LEFT)
+        right = copy.deepcopy(RIGHT)
+
+        expected = {
+            'key1': {
+                'key11': "val111111",
+                'key12': "val12",
+                'key13': {
+                    'key131': 'val131'
+                }
+            },
+            'key2': 'val2222',
+            'key3': 'val3'
+        }
+
+        result = utils.cow_merge_dicts(left, right)
+
+        self.assertDictEqual(expected, result)
+
+        # Arguments must stay untouched.
+        self.assertDictEqual(LEFT, left)
+        self.assertDictEqual(RIGHT, right)
+
+        # Only dictionaries that needed merging were copied.
+        self.assertIsNot(left['key1'], result['key1'])
+        self.assertIs(right['key1']['key13'], result['key1']['key13'])
+
     def test_itersubclasses(self):
         class A(object):
             pass
@@ -0,0 +1,108 @@
+# Copyright 2015 - Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import copy
+
+from mistral import exceptions as exc
+from mistral.tests import base
+from mistral.workbook import parser as spec_parser
+
+
+WF_SPEC = {
+    'version': '2.0',
+    'name': 'wf',
+    'tasks': {
+        'task1': {
+            'action': 'std.echo output="Hi"',
+            'on-success': 'task2'
+        },
+        'task2': {
+            'action': 'std.noop'
+        }
+    }
+}
+
+
+class SpecCachingTest(base.BaseTest):
+    def setUp(self):
+        super(SpecCachingTest, self).setUp()
+
+        spec_parser.clear_spec_cache()
+
+        self.addCleanup(spec_parser.clear_spec_cache)
+
+    def test_workflow_spec_cached(self):
+        wf_spec1 = spec_parser.get_workflow_spec(copy.deepcopy(WF_SPEC))
+        wf_spec2 = spec_parser.get_workflow_spec(copy.deepcopy(WF_SPEC))
+
+        self.assertIs(wf_spec1, wf_spec2)
+
+        stats = spec_parser.get_spec_cache_stats()
+
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_task_spec_cached(self):
+        wf_spec = spec_parser.get_workflow_spec(copy.deepcopy(WF_SPEC))
+
+        task_dict = wf_spec.get_tasks()['task1'].to_dict()
+
+        task_spec1 = spec_parser.get_task_spec(copy.deepcopy(task_dict))
+        task_spec2 = spec_parser.get_task_spec(copy.deepcopy(task_dict))
+
+        self.assertIs(task_spec1, task_spec2)
+        self.assertEqual('std.echo', task_spec1.get_action_name())
+
+    def test_different_specs_not_mixed(self):
+        wf_dict = copy.deepcopy(WF_SPEC)
+
+        wf_dict['name'] = 'wf2'
+
+        wf_spec1 = spec_parser.get_workflow_spec(copy.deepcopy(WF_SPEC))
+        wf_spec2 = spec_parser.get_workflow_spec(wf_dict)
+
+        self.assertIsNot(wf_spec1, wf_spec2)
+        self.assertEqual('wf', wf_spec1.get_name())
+        self.assertEqual('wf2', wf_spec2.get_name())
+
+    def test_trusted_spec_not_validated(self):
+        wf_dict = copy.deepcopy(WF_SPEC)
+
+        wf_dict['tasks']['task2']['publish'] = {'var': '<% $.+ %>'}
+
+        self.assertRaises(
+            exc.DSLParsingException,
+            spec_parser.get_workflow_spec,
+            copy.deepcopy(wf_dict)
+        )
+
+        wf_spec = spec_parser.get_workflow_spec(
+            copy.deepcopy(wf_dict),
+            validate=False
+        )
+
+        self.assertEqual(
+            {'var': '<% $.+ %>'},
+            wf_spec.get_tasks()['task2'].get_publish()
+        )
+
+    def test_trusted_and_strict_specs_cached_separately(self):
+        wf_spec1 = spec_parser.get_workflow_spec(
+            copy.deepcopy(WF_SPEC),
+            validate=False
+        )
+        wf_spec2 = spec_parser.get_workflow_spec(copy.deepcopy(WF_SPEC))
+
+        self.assertIsNot(wf_spec1, wf_spec2)
+        self.assertEqual(2, spec_parser.get_spec_cache_stats()['misses'])
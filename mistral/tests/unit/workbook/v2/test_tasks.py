@@ -17,6 +17,7 @@ from oslo_log import log as logging
 
 from mistral.tests.unit.workbook.v2 import base as v2_base
 from mistral import utils
+from mistral.workbook.v2 import tasks
 from mistral.workbook.v2 import workflows
 
 
@@ -304,3 +305,13 @@ class TaskSpecValidation(v2_base.WorkflowSpecValidationTestCase):
             self._parse_dsl_spec(add_tasks=True,
                                  changes=overlay,
                                  expect_error=expect_error)
+
+    def test_schema_validator_compiled_once(self):
+        direct_cls = tasks.DirectWorkflowTaskSpec
+        reverse_cls = tasks.ReverseWorkflowTaskSpec
+
+        validator = direct_cls._get_schema_validator()
+
+        self.assertIs(validator, direct_cls._get_schema_validator())
+        self.assertIsNot(validator, reverse_cls._get_schema_validator())
+        self.assertDictEqual(direct_cls.get_schema(), validator.schema)
@@ -56,6 +56,50 @@ class WorkflowSpecValidation(base.WorkflowSpecValidationTestCase):
         self.assertEqual('test', wfs_spec.get_workflows()[0].get_name())
         self.assertEqual('direct', wfs_spec.get_workflows()[0].get_type())
 
+    def test_direct_workflow_transitions(self):
+        overlay = {'test': {'type': 'direct', 'tasks': {}}}
+        join = {'join': 'all'}
+        on_success = {'on-success': ['email']}
+
+        utils.merge_dicts(overlay['test']['tasks'], {'get': on_success})
+        utils.merge_dicts(
+            overlay['test']['tasks'],
+            {'echo': {'on-success': ['email'], 'on-error': ['fail']}}
+        )
+        utils.merge_dicts(overlay['test']['tasks'], {'email': join})
+
+        wf_spec = self._parse_dsl_spec(
+            add_tasks=True,
+            changes=overlay,
+            expect_error=False
+        ).get_workflows()[0]
+
+        get_spec = wf_spec.get_tasks()['get']
+        echo_spec = wf_spec.get_tasks()['echo']
+        email_spec = wf_spec.get_tasks()['email']
+
+        self.assertEqual(
+            sorted(['get', 'echo']),
+            sorted([t_s.get_name() for t_s in wf_spec.find_start_tasks()])
+        )
+        self.assertEqual(
+            sorted(['get', 'echo']),
+            sorted([t_s.get_name()
+                    for t_s in wf_spec.find_inbound_task_specs(email_spec)])
+        )
+        self.assertEqual(
+            [email_spec],
+            wf_spec.find_outbound_task_specs(echo_spec)
+        )
+        self.assertEqual([], wf_spec.find_outbound_task_specs(email_spec))
+        self.assertTrue(wf_spec.transition_exists('get', 'email'))
+        self.assertTrue(wf_spec.transition_exists('echo', 'fail'))
+        self.assertFalse(wf_spec.transition_exists('email', 'get'))
+        self.assertFalse(wf_spec.has_inbound_transitions(get_spec))
+        self.assertTrue(wf_spec.has_outbound_transitions(get_spec))
+        self.assertEqual(2, wf_spec.get_join_fan_in(email_spec))
+        self.assertIsNone(wf_spec.get_join_fan_in(get_spec))
+
     def test_direct_workflow_invalid_task(self):
         overlay = {
             'test': {
@@ -100,6 +144,66 @@ class WorkflowSpecValidation(base.WorkflowSpecValidationTestCase):
         self.assertEqual('test', wfs_spec.get_workflows()[0].get_name())
         self.assertEqual('reverse', wfs_spec.get_workflows()[0].get_type())
 
+    def test_reverse_workflow_task_plan(self):
+        overlay = {'test': {'type': 'reverse', 'tasks': {}}}
+
+        utils.merge_dicts(
+            overlay['test']['tasks'],
+            {
+                'echo': {'requires': ['get']},
+                'email': {'requires': ['echo', 'get']},
+                'unused': {'action': 'std.noop'}
+            }
+        )
+
+        wf_spec = self._parse_dsl_spec(
+            add_tasks=True,
+            changes=overlay,
+            expect_error=False
+        ).get_workflows()[0]
+
+        email_spec = wf_spec.get_tasks()['email']
+
+        self.assertEqual(
+            ['echo', 'get'],
+            wf_spec.get_task_requires(email_spec)
+        )
+
+        plan = wf_spec.get_task_plan('email')
+
+        self.assertEqual(
+            ['get', 'echo', 'email'],
+            [t_s.get_name() for t_s in plan]
+        )
+
+        # Plan is calculated only once.
+        self.assertIs(plan, wf_spec.get_task_plan('email'))
+
+        self.assertEqual(
+            ['get'],
+            [t_s.get_name() for t_s in wf_spec.get_task_plan('get')]
+        )
+
+    def test_reverse_workflow_task_plan_unknown_task(self):
+        overlay = {'test': {'type': 'reverse', 'tasks': {}}}
+
+        utils.merge_dicts(
+            overlay['test']['tasks'],
+            {'email': {'requires': ['echo', 'invalid']}}
+        )
+
+        wf_spec = self._parse_dsl_spec(
+            add_tasks=True,
+            changes=overlay,
+            expect_error=False
+        ).get_workflows()[0]
+
+        self.assertRaises(
+            exc.WorkflowException,
+            wf_spec.get_task_plan,
+            'email'
+        )
+
     def test_reverse_workflow_invalid_task(self):
         overlay = {'test': {'type': 'reverse', 'tasks': {}}}
         join = {'join': 'all'}
@@ -54,6 +54,6 @@ class WorkflowControllerTest(base.BaseTest):
 
         wf_base.WorkflowController.get_controller(wf_ex)
 
-        mock_get_spec.assert_called_once_with("spec")
+        mock_get_spec.assert_called_once_with("spec", validate=False)
         mock_get_class.assert_called_once_with("direct")
         mock_handler_cls.assert_called_once_with(wf_ex)
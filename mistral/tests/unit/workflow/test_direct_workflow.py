@@ -157,3 +157,121 @@ class DirectWorkflowControllerTest(base.DbTestCase):
         """
 
         self.assertRaises(exc.DSLParsingException, self._prepare_test, wf_text)
+
+    def test_task_executions_index(self):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          type: direct
+
+          tasks:
+            task1:
+              action: std.noop
+              on-complete: task2
+
+            task2:
+              action: std.noop
+        """
+
+        self._prepare_test(wf_text)
+
+        task1_ex1 = self._create_task_execution('task1', states.ERROR)
+        task1_ex2 = self._create_task_execution('task1', states.SUCCESS)
+        task2_ex = self._create_task_execution('task2', states.RUNNING)
+
+        index = self.wf_ctrl.get_task_executions_index()
+
+        # The index is built only once.
+        self.assertIs(index, self.wf_ctrl.get_task_executions_index())
+
+        self.assertEqual([task1_ex1, task1_ex2], index.find_by_name('task1'))
+        self.assertEqual([], index.find_by_name('task3'))
+        self.assertEqual(
+            [task2_ex, task1_ex1, task1_ex2],
+            index.find_by_names(['task2', 'task1'])
+        )
+        self.assertEqual([task1_ex1], index.find_with_state(states.ERROR))
+        self.assertEqual(
+            task1_ex2,
+            index.find_task_execution_with_state('task1', states.SUCCESS)
+        )
+        self.assertEqual(
+            task1_ex2,
+            index.find_task_execution_not_state('task1', states.ERROR)
+        )
+        self.assertIsNone(
+            index.find_task_execution_with_state('task2', states.SUCCESS)
+        )
+        self.assertEqual([task1_ex1, task1_ex2], index.find_completed())
+        self.assertEqual(
+            [task2_ex],
+            self.wf_ctrl.find_incomplete_task_executions()
+        )
+        self.assertEqual(
+            set(['task1']),
+            index.get_task_names_with_state(states.SUCCESS)
+        )
+
+        # The index is a snapshot so it needs to be reset after
+        # task executions change.
+        task2_ex.state = states.SUCCESS
+
+        self.assertEqual(
+            [task2_ex],
+            self.wf_ctrl.find_incomplete_task_executions()
+        )
+
+        self.wf_ctrl.reset_task_executions_index()
+
+        self.assertEqual([], self.wf_ctrl.find_incomplete_task_executions())
+
+    @mock.patch.object(
+        d_wf.data_flow,
+        'evaluate_task_outbound_context',
+        return_value={'res': 'Hey'}
+    )
+    def test_next_task_names_memoized(self, evaluate_ctx):
+        wf_text = """---
+        version: '2.0'
+
+        wf:
+          type: direct
+
+          tasks:
+            task1:
+              action: std.noop
+              on-success:
+                - task2: <% $.res = 'Hey' %>
+                - task3: <% $.res != 'Hey' %>
+
+            task2:
+              action: std.noop
+
+            task3:
+              action: std.noop
+        """
+
+        self._prepare_test(wf_text)
+
+        task1_ex = self._create_task_execution('task1', states.SUCCESS)
+
+        find_next_task_names = self.wf_ctrl._find_next_task_names
+
+        self.assertEqual(['task2'], find_next_task_names(task1_ex))
+        self.assertEqual(['task2'], find_next_task_names(task1_ex))
+        self.assertTrue(self.wf_ctrl._has_outbound_tasks(task1_ex))
+
+        self.assertEqual(1, evaluate_ctx.call_count)
+        self.assertEqual(
+            {'state': states.SUCCESS, 'names': ['task2']},
+            task1_ex.runtime_context['next_task_names']
+        )
+
+        # Task runs again so its next tasks need to be calculated again.
+        d_wf.invalidate_next_task_names(task1_ex)
+
+        evaluate_ctx.return_value = {'res': 'Hi'}
+
+        self.assertEqual(['task3'], find_next_task_names(task1_ex))
+        self.assertEqual(2, evaluate_ctx.call_count)
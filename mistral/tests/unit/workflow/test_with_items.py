@@ -53,3 +53,58 @@ class WithItemsTest(base.BaseTest):
         indices = with_items.get_indices_for_loop(task_ex)
 
         self.assertListEqual([2, 3, 4], indices)
+
+    def test_counters(self):
+        task_ex = models.TaskExecution(
+            runtime_context={
+                'with_items_context': {
+                    'capacity': None,
+                    'count': 2,
+                    'index': 0,
+                    'accepted': 0,
+                    'running': 0,
+                    'error': 0
+                }
+            },
+            executions=[]
+        )
+
+        with_items.on_executions_started(task_ex, 2)
+
+        self.assertEqual(2, with_items.get_index(task_ex))
+        self.assertFalse(with_items.has_more_iterations(task_ex))
+        self.assertFalse(with_items.is_completed(task_ex))
+
+        with_items.on_action_complete(
+            task_ex,
+            self.get_action_ex(True, states.SUCCESS, 0)
+        )
+        with_items.on_action_complete(
+            task_ex,
+            self.get_action_ex(True, states.ERROR, 1)
+        )
+
+        self.assertTrue(with_items.is_completed(task_ex))
+        self.assertEqual(states.ERROR, with_items.get_final_state(task_ex))
+
+        # Rerun the failed iteration.
+        with_items.on_executions_unaccepted(
+            task_ex,
+            [self.get_action_ex(True, states.ERROR, 1)]
+        )
+
+        self.assertFalse(with_items.is_completed(task_ex))
+        self.assertTrue(with_items.has_more_iterations(task_ex))
+        self.assertEqual(states.SUCCESS, with_items.get_final_state(task_ex))
+
+    def test_get_item_input(self):
+        with_items_input = {
+            'itemX': [1, 2],
+            'itemY': ['a', 'b']
+        }
+
+        self.assertEqual(2, with_items.get_items_count(with_items_input))
+        self.assertDictEqual(
+            {'itemX': 2, 'itemY': 'b'},
+            with_items.get_item_input(with_items_input, 1)
+        )
@@ -142,6 +142,43 @@ def merge_dicts(left, right, overwrite=True):
     return left
 
 
+def cow_merge_dicts(left, right, overwrite=True):
+    """Merges two dictionaries without modifying any of them.
+
+    It's a copy-on-write version of merge_dicts(). The result is a new
+    dictionary that shares all values with the given dictionaries except
+    nested dictionaries that both of them have under the same key. Only
+    those get copied (recursively, in the same manner). So it's much
+    cheaper than deep copying, especially for big data flow contexts.
+
+    Note that since values are shared the result must be changed only
+    by this function or by setting top level keys.
+
+    :param left: Left dictionary.
+    :param right: Right dictionary.
+    :param overwrite: If False, left value will not be overwritten if exists.
+    :return: New merged dictionary.
+    """
+
+    result = dict(left) if left is not None else {}
+
+    if right is None:
+        return result
+
+    for k, v in six.iteritems(right):
+        if k not in result:
+            result[k] = v
+        else:
+            left_v = result[k]
+
+            if isinstance(left_v, dict) and isinstance(v, dict):
+                result[k] = cow_merge_dicts(left_v, v, overwrite=overwrite)
+            elif overwrite:
+                result[k] = v
+
+    return result
+
+
 def get_file_list(directory):
     base_path = pkg.resource_filename(
         version.version_info.package,
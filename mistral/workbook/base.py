@@ -43,8 +43,14 @@ ALL = (
 
 PARAMS_PTRN = re.compile("([-_\w]+)=(%s)" % "|".join(ALL))
 
+_VALIDATION_DISABLED = 'spec_validation_disabled'
 
-def instantiate_spec(spec_cls, data):
+
+def _is_validation_enabled():
+    return not utils.get_thread_local(_VALIDATION_DISABLED)
+
+
+def instantiate_spec(spec_cls, data, validate=True):
     """Instantiates specification accounting for specification hierarchies.
 
     :param spec_cls: Specification concrete or base class. In case if base
@@ -52,8 +58,24 @@ def instantiate_spec(spec_cls, data):
         _polymorphic_key and _polymorphic_value in order to find a concrete
         class that needs to be instantiated.
     :param data: Raw specification data as a dictionary.
+    :param validate: If False then schema and semantics validation is
+        skipped for the specification and all its nested specifications.
+        It must be used only for data that has already been validated,
+        e.g. specifications persisted when a workflow was uploaded.
     """
 
+    if validate or not _is_validation_enabled():
+        return _instantiate_spec(spec_cls, data)
+
+    utils.set_thread_local(_VALIDATION_DISABLED, True)
+
+    try:
+        return _instantiate_spec(spec_cls, data)
+    finally:
+        utils.set_thread_local(_VALIDATION_DISABLED, None)
+
+
+def _instantiate_spec(spec_cls, data):
     if issubclass(spec_cls, BaseSpecList):
         # Ignore polymorphic search for specification lists because
         # it doesn't make sense for them.
@@ -62,7 +84,8 @@ def instantiate_spec(spec_cls, data):
     if not hasattr(spec_cls, '_polymorphic_key'):
         spec = spec_cls(data)
 
-        spec.validate_semantics()
+        if _is_validation_enabled():
+            spec.validate_semantics()
 
         return spec
 
@@ -86,9 +109,10 @@ def instantiate_spec(spec_cls, data):
         if cls._polymorphic_value == data.get(key_name, key_default):
             spec = cls(data)
 
-            spec.validate_semantics()
+            if _is_validation_enabled():
+                spec.validate_semantics()
 
-            return cls(data)
+            return spec
 
     raise exc.DSLParsingException(
         'Failed to find a specification class to instantiate '
@@ -158,10 +182,34 @@ class BaseSpec(object):
 
         return schema
 
+    @classmethod
+    def _get_schema_validator(cls):
+        """Returns compiled JSON schema validator for this spec class.
+
+        Merging schemas and building a validator is expensive so it's
+        done only once per class. The validator is stored in the class
+        dictionary directly so that subclasses never get a validator of
+        their parent class.
+        """
+        validator = cls.__dict__.get('_schema_validator')
+
+        if validator is None:
+            schema = cls.get_schema()
+
+            validator_cls = jsonschema.validators.validator_for(schema)
+            validator_cls.check_schema(schema)
+
+            validator = validator_cls(schema)
+
+            cls._schema_validator = validator
+
+        return validator
+
     def __init__(self, data):
         self._data = data
 
-        self.validate_schema()
+        if _is_validation_enabled():
+            self.validate_schema()
 
     def validate_schema(self):
         """Validates DSL entity schema that this specification represents.
@@ -177,7 +225,7 @@ class BaseSpec(object):
         """
 
         try:
-            jsonschema.validate(self._data, self.get_schema())
+            self._get_schema_validator().validate(self._data)
         except jsonschema.ValidationError as e:
             raise exc.InvalidModelException("Invalid DSL: %s" % e)
 
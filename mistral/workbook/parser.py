@@ -13,10 +13,15 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import hashlib
+import json
+
+from oslo_config import cfg
 import yaml
 from yaml import error
 
 from mistral import exceptions as exc
+from mistral.utils import cache
 from mistral.workbook import base
 from mistral.workbook.v2 import actions as actions_v2
 from mistral.workbook.v2 import tasks as tasks_v2
@@ -27,6 +32,13 @@ V2_0 = '2.0'
 
 ALL_VERSIONS = [V2_0]
 
+CONF = cfg.CONF
+CONF.import_opt('spec_cache_size', 'mistral.config', group='engine')
+
+# Process-wide cache of parsed specifications keyed by a hash of their
+# raw data. It's created lazily so that configuration is already loaded.
+_SPEC_CACHE = None
+
 
 def parse_yaml(text):
     """Loads a text in YAML format as dictionary object.
@@ -56,6 +68,59 @@ def _get_spec_version(spec_dict):
     return ver
 
 
+def _get_spec_cache():
+    global _SPEC_CACHE
+
+    if _SPEC_CACHE is None:
+        _SPEC_CACHE = cache.LRUCache(CONF.engine.spec_cache_size)
+
+    return _SPEC_CACHE
+
+
+def _get_spec_key(spec_cls, spec_dict, validate):
+    spec_hash = hashlib.sha256(
+        json.dumps(spec_dict, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+    # Specifications built without validation are cached separately so
+    # that strict callers never get a specification that wasn't validated.
+    return spec_cls.__name__, spec_hash, validate
+
+
+def _instantiate_cached_spec(spec_cls, spec_dict, validate=True):
+    """Instantiates specification or takes it from the cache.
+
+    Note that specification objects returned by this function are shared
+    between all callers and hence must never be modified.
+    """
+
+    spec_cache = _get_spec_cache()
+
+    if spec_cache.maxsize <= 0:
+        return base.instantiate_spec(spec_cls, spec_dict, validate=validate)
+
+    # The key must be calculated before instantiation because
+    # specifications may modify raw data they are built from.
+    key = _get_spec_key(spec_cls, spec_dict, validate)
+
+    spec = spec_cache.get(key)
+
+    if spec is None:
+        spec = base.instantiate_spec(spec_cls, spec_dict, validate=validate)
+
+        spec_cache.put(key, spec)
+
+    return spec
+
+
+def get_spec_cache_stats():
+    return _get_spec_cache().get_stats()
+
+
+def clear_spec_cache():
+    _get_spec_cache().clear()
+
+
 # Factory methods to get specifications either from raw YAML formatted text or
 # from dictionaries parsed from YAML formatted text.
 
@@ -94,9 +159,20 @@ def get_action_list_spec_from_yaml(text):
     return get_action_list_spec(parse_yaml(text))
 
 
-def get_workflow_spec(spec_dict):
+def get_workflow_spec(spec_dict, validate=True):
+    """Gets workflow specification from a dictionary.
+
+    :param spec_dict: Raw workflow specification.
+    :param validate: If False then the specification is built without
+        validation. It should be used by the engine only for specifications
+        loaded from DB since they were validated when uploaded.
+    """
     if _get_spec_version(spec_dict) == V2_0:
-        return base.instantiate_spec(wf_v2.WorkflowSpec, spec_dict)
+        return _instantiate_cached_spec(
+            wf_v2.WorkflowSpec,
+            spec_dict,
+            validate=validate
+        )
 
     return None
 
@@ -113,8 +189,18 @@ def get_workflow_list_spec_from_yaml(text):
     return get_workflow_list_spec(parse_yaml(text))
 
 
-def get_task_spec(spec_dict):
+def get_task_spec(spec_dict, validate=True):
+    """Gets task specification from a dictionary.
+
+    :param spec_dict: Raw task specification.
+    :param validate: If False then the specification is built without
+        validation. See get_workflow_spec() for details.
+    """
     if _get_spec_version(spec_dict) == V2_0:
-        return base.instantiate_spec(tasks_v2.TaskSpec, spec_dict)
+        return _instantiate_cached_spec(
+            tasks_v2.TaskSpec,
+            spec_dict,
+            validate=validate
+        )
 
     return None
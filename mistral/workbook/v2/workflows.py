@@ -125,6 +125,68 @@ class DirectWorkflowSpec(WorkflowSpec):
         }
     }
 
+    def __init__(self, data):
+        super(DirectWorkflowSpec, self).__init__(data)
+
+        # Transitions between tasks don't change so the transition graph
+        # is built once instead of scanning all task clauses every time
+        # the workflow controller needs inbound or outbound tasks.
+        self._build_transition_graph()
+
+    def _build_transition_graph(self):
+        self._outbound_task_names = {}
+        self._inbound_task_specs = {}
+        self._outbound_task_specs = {}
+        self._join_fan_in = {}
+
+        for t_s in self.get_tasks():
+            t_name = t_s.get_name()
+
+            t_names = set()
+
+            for clause in (self.get_on_error_clause(t_name),
+                           self.get_on_success_clause(t_name),
+                           self.get_on_complete_clause(t_name)):
+                for tup in clause or []:
+                    t_names.add(tup[0])
+
+            self._outbound_task_names[t_name] = t_names
+            self._inbound_task_specs[t_name] = []
+            self._outbound_task_specs[t_name] = []
+
+        # Keep the order in which task specifications are iterated.
+        positions = dict(
+            (t_s.get_name(), idx) for idx, t_s in enumerate(self.get_tasks())
+        )
+
+        for from_t_s in self.get_tasks():
+            from_name = from_t_s.get_name()
+
+            # Transitions may also point to engine commands like 'fail'
+            # which are not tasks.
+            to_names = sorted(
+                [t_n for t_n in self._outbound_task_names[from_name]
+                 if t_n in positions],
+                key=positions.get
+            )
+
+            for to_name in to_names:
+                self._inbound_task_specs[to_name].append(from_t_s)
+                self._outbound_task_specs[from_name].append(
+                    self.get_tasks()[to_name]
+                )
+
+        self._start_tasks = [
+            t_s for t_s in self.get_tasks()
+            if not self._inbound_task_specs[t_s.get_name()]
+        ]
+
+        for t_s in self.get_tasks():
+            if t_s.get_join():
+                self._join_fan_in[t_s.get_name()] = len(
+                    self._inbound_task_specs[t_s.get_name()]
+                )
+
     def validate_semantics(self):
         # Check if there are start tasks.
         if not self.find_start_tasks():
@@ -135,22 +197,13 @@ class DirectWorkflowSpec(WorkflowSpec):
             )
 
     def find_start_tasks(self):
-        return [
-            t_s for t_s in self.get_tasks()
-            if not self.has_inbound_transitions(t_s)
-        ]
+        return self._start_tasks
 
     def find_inbound_task_specs(self, task_spec):
-        return [
-            t_s for t_s in self.get_tasks()
-            if self.transition_exists(t_s.get_name(), task_spec.get_name())
-        ]
+        return self._inbound_task_specs.get(task_spec.get_name(), [])
 
     def find_outbound_task_specs(self, task_spec):
-        return [
-            t_s for t_s in self.get_tasks()
-            if self.transition_exists(task_spec.get_name(), t_s.get_name())
-        ]
+        return self._outbound_task_specs.get(task_spec.get_name(), [])
 
     def has_inbound_transitions(self, task_spec):
         return len(self.find_inbound_task_specs(task_spec)) > 0
@@ -159,18 +212,19 @@ class DirectWorkflowSpec(WorkflowSpec):
         return len(self.find_outbound_task_specs(task_spec)) > 0
 
     def transition_exists(self, from_task_name, to_task_name):
-        t_names = set()
-
-        for tup in self.get_on_error_clause(from_task_name):
-            t_names.add(tup[0])
-
-        for tup in self.get_on_success_clause(from_task_name):
-            t_names.add(tup[0])
+        return to_task_name in self._outbound_task_names.get(
+            from_task_name,
+            ()
+        )
 
-        for tup in self.get_on_complete_clause(from_task_name):
-            t_names.add(tup[0])
+    def get_join_fan_in(self, task_spec):
+        """Gets a number of inbound transitions of a "join" task.
 
-        return to_task_name in t_names
+        :param task_spec: Task specification.
+        :return: Number of tasks having transitions to the given task
+            or None if the task is not a "join" task.
+        """
+        return self._join_fan_in.get(task_spec.get_name())
 
     def get_on_error_clause(self, t_name):
         result = self.get_tasks()[t_name].get_on_error()
@@ -235,6 +289,95 @@ class ReverseWorkflowSpec(WorkflowSpec):
         }
     }
 
+    def __init__(self, data):
+        super(ReverseWorkflowSpec, self).__init__(data)
+
+        self._task_requires = dict(
+            (t_s.get_name(), self._build_task_requires(t_s))
+            for t_s in self.get_tasks()
+        )
+
+        # Execution plans are calculated on demand for every target task
+        # and then reused by all executions of the workflow.
+        self._task_plans = {}
+
+    def _build_task_requires(self, task_spec):
+        requires = set(task_spec.get_requires())
+
+        task_defaults = self.get_task_defaults()
+
+        if task_defaults:
+            requires |= set(task_defaults.get_requires())
+
+        requires.discard(task_spec.get_name())
+
+        return sorted(requires)
+
+    def get_task_requires(self, task_spec):
+        """Gets names of tasks that the given task directly depends on.
+
+        :param task_spec: Task specification.
+        :return: List of task names including 'requires' of task defaults.
+        """
+        return self._task_requires.get(task_spec.get_name(), [])
+
+    def get_task_plan(self, task_name):
+        """Gets a list of tasks needed to run the given target task.
+
+        :param task_name: Target task name.
+        :return: List of task specifications that the target task
+            transitively depends on (including the target task itself)
+            sorted so that every task goes after all its dependencies.
+        """
+        plan = self._task_plans.get(task_name)
+
+        if plan is None:
+            plan = self._build_task_plan(task_name)
+
+            self._task_plans[task_name] = plan
+
+        return plan
+
+    def _build_task_plan(self, task_name):
+        tasks_spec = self.get_tasks()
+
+        def _get_requires(t_s):
+            requires = self.get_task_requires(t_s)
+
+            for req in requires:
+                if not tasks_spec[req]:
+                    raise exc.WorkflowException("Task '%s' not found." % req)
+
+            return iter(requires)
+
+        target_spec = tasks_spec[task_name]
+
+        plan = []
+        visited = set([task_name])
+        stack = [(target_spec, _get_requires(target_spec))]
+
+        # Depth first traversal adding a task to the plan after all
+        # its dependencies. Recursion isn't used to let long chains of
+        # tasks not hit the recursion limit.
+        while stack:
+            t_s, requires = stack[-1]
+
+            for req in requires:
+                if req not in visited:
+                    visited.add(req)
+
+                    req_spec = tasks_spec[req]
+
+                    stack.append((req_spec, _get_requires(req_spec)))
+
+                    break
+            else:
+                stack.pop()
+
+                plan.append(t_s)
+
+        return plan
+
 
 class WorkflowSpecList(base.BaseSpecList):
     item_class = WorkflowSpec
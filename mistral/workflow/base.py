@@ -15,7 +15,6 @@
 #    limitations under the License.
 
 import abc
-import copy
 
 from oslo_log import log as logging
 
@@ -46,7 +45,39 @@ class WorkflowController(object):
         :param wf_ex: Workflow execution.
         """
         self.wf_ex = wf_ex
-        self.wf_spec = spec_parser.get_workflow_spec(wf_ex.spec)
+        self.wf_spec = spec_parser.get_workflow_spec(
+            wf_ex.spec,
+            validate=False
+        )
+        self._task_execs_index = None
+
+    def get_task_executions_index(self):
+        """Gets an index of task executions of the workflow execution.
+
+        The index is built on first use so that all lookups made while
+        processing one event take constant time instead of scanning all
+        task executions.
+
+        :return: Instance of mistral.workflow.utils.TaskExecutionIndex.
+        """
+        if self._task_execs_index is None:
+            self._task_execs_index = wf_utils.TaskExecutionIndex(
+                self.wf_ex.task_executions
+            )
+
+        return self._task_execs_index
+
+    def reset_task_executions_index(self):
+        """Resets the index of task executions.
+
+        Must be called if task executions were created or changed their
+        states after the index had been built, e.g. when workflow commands
+        have been dispatched.
+        """
+        self._task_execs_index = None
+
+    def find_incomplete_task_executions(self):
+        return self.get_task_executions_index().find_incomplete()
 
     def continue_workflow(self, task_ex=None, reset=True):
         """Calculates a list of commands to continue the workflow.
@@ -60,6 +91,9 @@ class WorkflowController(object):
         :return: List of workflow commands (instances of
             mistral.workflow.commands.WorkflowCommand).
         """
+        # Task executions could change since the previous call.
+        self.reset_task_executions_index()
+
         if self._is_paused_or_completed():
             return []
 
@@ -97,11 +131,15 @@ class WorkflowController(object):
     def _get_task_inbound_context(self, task_spec):
         upstream_task_execs = self._get_upstream_task_executions(task_spec)
 
-        return u.merge_dicts(
-            copy.copy(self.wf_ex.context),
+        ctx = u.cow_merge_dicts(
+            self.wf_ex.context,
             data_flow.evaluate_upstream_context(upstream_task_execs)
         )
 
+        # Workflow invariants are kept only in the workflow execution
+        # context so that they're not stored again with every task.
+        return data_flow.remove_workflow_invariants_from_context(ctx)
+
     @abc.abstractmethod
     def _get_upstream_task_executions(self, task_spec):
         """Gets workflow upstream tasks for the given task.
@@ -120,8 +158,7 @@ class WorkflowController(object):
         :return: List of workflow commands.
         """
         # Add all tasks in IDLE state.
-        idle_tasks = wf_utils.find_task_executions_with_state(
-            self.wf_ex,
+        idle_tasks = self.get_task_executions_index().find_with_state(
             states.IDLE
         )
 
@@ -161,6 +198,9 @@ class WorkflowController(object):
     @staticmethod
     def get_controller(wf_ex, wf_spec=None):
         if not wf_spec:
-            wf_spec = spec_parser.get_workflow_spec(wf_ex['spec'])
+            wf_spec = spec_parser.get_workflow_spec(
+                wf_ex['spec'],
+                validate=False
+            )
 
         return WorkflowController._get_class(wf_spec.get_type())(wf_ex)
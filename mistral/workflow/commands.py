@@ -64,7 +64,7 @@ class RunExistingTask(WorkflowCommand):
 
     def __init__(self, task_ex, reset=True):
         wf_ex = task_ex.workflow_execution
-        task_spec = spec_parser.get_task_spec(task_ex.spec)
+        task_spec = spec_parser.get_task_spec(task_ex.spec, validate=False)
         self.task_ex = task_ex
         self.reset = reset
 
@@ -13,10 +13,12 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
 import copy
 
 from oslo_config import cfg
 from oslo_log import log as logging
+import six
 
 from mistral import context as auth_ctx
 from mistral.db.v2 import api as db_api
@@ -26,11 +28,29 @@ from mistral import utils
 from mistral.utils import inspect_utils
 from mistral.workbook import parser as spec_parser
 from mistral.workflow import states
+from mistral.workflow import with_items
 
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
+# Context keys that have the same values for all tasks of a workflow
+# execution: execution data, environment and security context. They are
+# stored only in the workflow execution context and get added to task
+# contexts right before evaluating expressions.
+WORKFLOW_INVARIANT_KEYS = ('__execution', '__env', 'openstack')
+
+# Key of workflow execution runtime context under which the index of
+# task execution ids by task names is stored.
+_TASK_EXECUTION_IDS = 'task_execution_ids'
+
+# Key of task context under which ids of direct upstream task executions
+# are kept by task names.
+_UPSTREAM_TASKS = '__upstream_tasks'
+
+# Key of transaction cache under which task results are stored.
+_TASK_RESULTS = 'task_results'
+
 
 def evaluate_upstream_context(upstream_task_execs):
     published_vars = {}
@@ -41,35 +61,24 @@ def evaluate_upstream_context(upstream_task_execs):
         # temporary solution.There's still the bug
         # https://bugs.launchpad.net/mistral/+bug/1424461 that needs to be
         # fixed using context variable versioning.
-        published_vars = utils.merge_dicts(
+        published_vars = utils.cow_merge_dicts(
             published_vars,
             t_ex.published
         )
 
-        utils.merge_dicts(
+        ctx = utils.cow_merge_dicts(
             ctx,
             evaluate_task_outbound_context(t_ex, include_result=False)
         )
 
-    ctx = utils.merge_dicts(ctx, published_vars)
-
-    # TODO(rakhmerov): IMO, this method shouldn't deal with these task ids or
-    # anything else related to task proxies. Need to refactor.
-    return utils.merge_dicts(
-        ctx,
-        _get_task_identifiers_dict(upstream_task_execs)
-    )
-
-
-# TODO(rakhmerov): Think how to gt rid of this method and the whole trick
-# with upstream tasks. It doesn't look clear from design standpoint.
-def _get_task_identifiers_dict(task_execs):
-    tasks = {}
+    ctx = utils.cow_merge_dicts(ctx, published_vars)
 
-    for task_ex in task_execs:
-        tasks[task_ex.id] = task_ex.name
+    # Only direct upstream tasks are kept so that contexts don't grow with
+    # workflow length. Results of other tasks are found through them or
+    # through the workflow execution index.
+    ctx[_UPSTREAM_TASKS] = {t_ex.name: t_ex.id for t_ex in upstream_task_execs}
 
-    return {"__tasks": tasks}
+    return ctx
 
 
 def _extract_execution_result(ex):
@@ -81,11 +90,50 @@ def _extract_execution_result(ex):
 
 
 def invalidate_task_execution_result(task_ex):
+    with_items.on_executions_unaccepted(task_ex, task_ex.executions)
+
     for ex in task_ex.executions:
         ex.accepted = False
 
+    invalidate_task_result_cache(task_ex.id)
+
+
+def _get_task_result_cache():
+    tx_cache = db_api.get_transaction_cache()
+
+    if tx_cache is None:
+        return None
+
+    return tx_cache.setdefault(_TASK_RESULTS, {})
+
+
+def invalidate_task_result_cache(task_ex_id):
+    """Drops task result cached within current transaction.
+
+    Must be called whenever accepted action executions of the task or
+    their outputs change.
+    """
+    cache = _get_task_result_cache()
+
+    if cache is not None:
+        cache.pop(task_ex_id, None)
+
 
 def get_task_execution_result(task_ex):
+    cache = _get_task_result_cache()
+
+    if cache is not None and task_ex.id in cache:
+        return cache[task_ex.id]
+
+    result = _evaluate_task_execution_result(task_ex)
+
+    if cache is not None:
+        cache[task_ex.id] = result
+
+    return result
+
+
+def _evaluate_task_execution_result(task_ex):
     action_execs = task_ex.executions
     action_execs.sort(
         key=lambda x: x.runtime_context.get('with_items_index')
@@ -97,7 +145,7 @@ def get_task_execution_result(task_ex):
         if hasattr(ex, 'output') and ex.accepted
     ]
 
-    task_spec = spec_parser.get_task_spec(task_ex.spec)
+    task_spec = spec_parser.get_task_spec(task_ex.spec, validate=False)
 
     if task_spec.get_with_items():
         return results
@@ -110,7 +158,14 @@ class TaskResultProxy(object):
         self.task_id = task_id
 
     def get(self):
+        # Don't load task execution if its result is already known.
+        cache = _get_task_result_cache()
+
+        if cache is not None and self.task_id in cache:
+            return cache[self.task_id]
+
         task_ex = db_api.get_task_execution(self.task_id)
+
         return get_task_execution_result(task_ex)
 
     def __str__(self):
@@ -146,7 +201,10 @@ def publish_variables(task_ex, task_spec):
     if task_ex.state != states.SUCCESS:
         return
 
-    expr_ctx = extract_task_result_proxies_to_context(task_ex.in_context)
+    expr_ctx = extract_task_result_proxies_to_context(
+        task_ex.in_context,
+        task_ex.workflow_execution
+    )
 
     if task_ex.name in expr_ctx:
         LOG.warning(
@@ -157,6 +215,8 @@ def publish_variables(task_ex, task_spec):
     # Add result of current task to context for variables evaluation.
     expr_ctx[task_ex.name] = TaskResultProxy(task_ex.id)
 
+    add_workflow_invariants_to_context(task_ex.workflow_execution, expr_ctx)
+
     task_ex.published = expr.evaluate_recursively(
         task_spec.get_publish(),
         expr_ctx
@@ -168,6 +228,8 @@ def destroy_task_result(task_ex):
         if hasattr(ex, 'output'):
             ex.output = {}
 
+    invalidate_task_result_cache(task_ex.id)
+
 
 def evaluate_task_outbound_context(task_ex, include_result=True):
     """Evaluates task outbound Data Flow context.
@@ -180,21 +242,18 @@ def evaluate_task_outbound_context(task_ex, include_result=True):
     :return: Outbound task Data Flow context.
     """
 
-    in_context = (copy.deepcopy(dict(task_ex.in_context))
-                  if task_ex.in_context is not None else {})
-
-    out_ctx = utils.merge_dicts(in_context, task_ex.published)
+    # Task context is shared, not copied, so it must not be modified.
+    out_ctx = ProxyAwareDict(
+        utils.cow_merge_dicts(task_ex.in_context, task_ex.published)
+    )
 
     # Add task output under key 'taskName'.
     if include_result:
-        task_ex_result = TaskResultProxy(task_ex.id)
+        out_ctx[task_ex.name] = TaskResultProxy(task_ex.id)
 
-        out_ctx = utils.merge_dicts(
-            out_ctx,
-            {task_ex.name: task_ex_result or None}
-        )
+    add_workflow_invariants_to_context(task_ex.workflow_execution, out_ctx)
 
-    return ProxyAwareDict(out_ctx)
+    return out_ctx
 
 
 def evaluate_workflow_output(wf_spec, context):
@@ -204,7 +263,8 @@ def evaluate_workflow_output(wf_spec, context):
     :param context: Final Data Flow context (cause task's outbound context).
     """
     # Convert context to ProxyAwareDict for correct output evaluation.
-    context = ProxyAwareDict(copy.deepcopy(context))
+    # Evaluation doesn't modify the context so a shallow copy is enough.
+    context = ProxyAwareDict(context)
 
     output_dict = wf_spec.get_output()
 
@@ -249,6 +309,41 @@ def add_environment_to_context(wf_ex):
         wf_ex.context['__env'] = expr.evaluate_recursively(env, {'__env': env})
 
 
+def add_workflow_invariants_to_context(wf_ex, ctx):
+    """Adds workflow execution invariants to the given task context.
+
+    Values are taken from the workflow execution context by reference so
+    the resulting context must be used only for expression evaluation.
+
+    :param wf_ex: Workflow execution DB model.
+    :param ctx: Task context. It gets modified.
+    :return: The same context.
+    """
+    wf_ctx = wf_ex.context or {}
+
+    for k in WORKFLOW_INVARIANT_KEYS:
+        if k in wf_ctx:
+            ctx[k] = wf_ctx[k]
+
+    return ctx
+
+
+def get_task_expression_context(task_ex):
+    """Returns task inbound context prepared for expression evaluation."""
+    return add_workflow_invariants_to_context(
+        task_ex.workflow_execution,
+        dict(task_ex.in_context or {})
+    )
+
+
+def remove_workflow_invariants_from_context(ctx):
+    """Returns a copy of the given context without workflow invariants."""
+    return {
+        k: v for k, v in six.iteritems(ctx)
+        if k not in WORKFLOW_INVARIANT_KEYS
+    }
+
+
 def add_workflow_variables_to_context(wf_ex, wf_spec):
     wf_ex.context = wf_ex.context or {}
 
@@ -258,12 +353,102 @@ def add_workflow_variables_to_context(wf_ex, wf_spec):
     )
 
 
+def add_task_execution_to_index(wf_ex, task_ex):
+    """Makes task execution the one its name refers to in expressions.
+
+    Workflow execution keeps an index of task execution ids by task names
+    so that task results can be found without storing identifiers of all
+    upstream tasks in every task context.
+    """
+    wf_ex.runtime_context = wf_ex.runtime_context or {}
+
+    # Assign a new dictionary so that the change gets tracked.
+    index = dict(wf_ex.runtime_context.get(_TASK_EXECUTION_IDS, {}))
+    index[task_ex.name] = task_ex.id
+
+    wf_ex.runtime_context[_TASK_EXECUTION_IDS] = index
+
+
+def get_task_execution_index(wf_ex):
+    return (wf_ex.runtime_context or {}).get(_TASK_EXECUTION_IDS, {})
+
+
+def _find_upstream_task_executions(wf_ex, task_ex_ids, names):
+    """Finds ids of the nearest upstream executions of the given tasks.
+
+    Task executions are walked back from the given ones through ids of
+    their direct upstream task executions.
+    """
+    task_execs = {t_ex.id: t_ex for t_ex in wf_ex.task_executions}
+
+    names = set(names)
+    found = {}
+
+    queue = collections.deque(task_ex_ids)
+    visited = set(task_ex_ids)
+
+    while queue and len(found) < len(names):
+        t_ex = task_execs.get(queue.popleft())
+
+        if not t_ex:
+            continue
+
+        if t_ex.name in names:
+            found.setdefault(t_ex.name, t_ex.id)
+
+        upstream = (t_ex.in_context or {}).get(_UPSTREAM_TASKS, {})
+
+        for t_ex_id in upstream.values():
+            if t_ex_id not in visited:
+                visited.add(t_ex_id)
+                queue.append(t_ex_id)
+
+    return found
+
+
 # TODO(rakhmerov): Think how to get rid of this method. It should not be
 # exposed in API.
-def extract_task_result_proxies_to_context(ctx):
-    ctx = ProxyAwareDict(copy.deepcopy(ctx))
+def extract_task_result_proxies_to_context(ctx, wf_ex):
+    # Only top level keys get added so a shallow copy is enough.
+    ctx = ProxyAwareDict(ctx)
+
+    # Contexts of tasks started before the index was introduced still
+    # keep identifiers of all upstream tasks.
+    if '__tasks' in ctx:
+        for task_ex_id, task_ex_name in ctx.pop('__tasks').iteritems():
+            ctx[task_ex_name] = TaskResultProxy(task_ex_id)
+
+        return ctx
+
+    upstream = ctx.pop(_UPSTREAM_TASKS, {})
+
+    # Names of tasks that aren't direct upstream ones refer to their
+    # latest executions unless they are taken by variables.
+    shadowed = []
+
+    for task_ex_name, task_ex_id in get_task_execution_index(wf_ex).items():
+        if task_ex_name in upstream:
+            continue
+
+        if task_ex_name in ctx:
+            shadowed.append(task_ex_name)
+        else:
+            ctx[task_ex_name] = TaskResultProxy(task_ex_id)
+
+    # Results of upstream tasks take precedence over variables with the
+    # same names. Whether a task is upstream needs to be found out only
+    # for names taken by variables.
+    if shadowed:
+        found = _find_upstream_task_executions(
+            wf_ex,
+            upstream.values(),
+            shadowed
+        )
+
+        for task_ex_name, task_ex_id in found.items():
+            ctx[task_ex_name] = TaskResultProxy(task_ex_id)
 
-    for task_ex_id, task_ex_name in ctx['__tasks'].iteritems():
+    for task_ex_name, task_ex_id in upstream.items():
         ctx[task_ex_name] = TaskResultProxy(task_ex_id)
 
     return ctx
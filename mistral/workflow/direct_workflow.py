@@ -21,11 +21,24 @@ from mistral.workflow import base
 from mistral.workflow import commands
 from mistral.workflow import data_flow
 from mistral.workflow import states
-from mistral.workflow import utils as wf_utils
 
 
 LOG = logging.getLogger(__name__)
 
+# Key of task execution runtime context under which names of next tasks
+# calculated for a completed task are kept.
+_NEXT_TASK_NAMES = 'next_task_names'
+
+
+def invalidate_next_task_names(task_ex):
+    """Removes memoized names of next tasks of the given task execution.
+
+    Must be called when a completed task execution runs again since
+    its result and hence the next tasks may change.
+    """
+    if task_ex.runtime_context and _NEXT_TASK_NAMES in task_ex.runtime_context:
+        del task_ex.runtime_context[_NEXT_TASK_NAMES]
+
 
 class DirectWorkflowController(base.WorkflowController):
     """'Direct workflow' handler.
@@ -45,9 +58,9 @@ class DirectWorkflowController(base.WorkflowController):
     def _get_upstream_task_executions(self, task_spec):
         return filter(
             lambda t_e: self._is_upstream_task_execution(task_spec, t_e),
-            wf_utils.find_task_executions_by_specs(
-                self.wf_ex,
-                self.wf_spec.find_inbound_task_specs(task_spec)
+            self.get_task_executions_index().find_by_names(
+                [t_s.get_name() for t_s in
+                 self.wf_spec.find_inbound_task_specs(task_spec)]
             )
         )
 
@@ -70,8 +83,9 @@ class DirectWorkflowController(base.WorkflowController):
             return self._find_start_commands()
 
         task_execs = [
-            t_ex for t_ex in self.wf_ex.task_executions
-            if states.is_completed(t_ex.state) and not t_ex.processed
+            t_ex for t_ex in
+            self.get_task_executions_index().find_completed()
+            if not t_ex.processed
         ]
 
         for t_ex in task_execs:
@@ -136,7 +150,7 @@ class DirectWorkflowController(base.WorkflowController):
         ctx = {}
 
         for t_ex in self._find_end_tasks():
-            ctx = utils.merge_dicts(
+            ctx = utils.cow_merge_dicts(
                 ctx,
                 data_flow.evaluate_task_outbound_context(t_ex)
             )
@@ -147,7 +161,9 @@ class DirectWorkflowController(base.WorkflowController):
         return bool(self.wf_spec.get_on_error_clause(task_ex.name))
 
     def all_errors_handled(self):
-        for t_ex in wf_utils.find_error_task_executions(self.wf_ex):
+        t_ex_index = self.get_task_executions_index()
+
+        for t_ex in t_ex_index.find_with_state(states.ERROR):
             if not self.wf_spec.get_on_error_clause(t_ex.name):
                 return False
 
@@ -156,7 +172,7 @@ class DirectWorkflowController(base.WorkflowController):
     def _find_end_tasks(self):
         return filter(
             lambda t_ex: not self._has_outbound_tasks(t_ex),
-            wf_utils.find_successful_task_executions(self.wf_ex)
+            self.get_task_executions_index().find_with_state(states.SUCCESS)
         )
 
     def _has_outbound_tasks(self, task_ex):
@@ -171,6 +187,30 @@ class DirectWorkflowController(base.WorkflowController):
 
     def _find_next_task_names(self, task_ex):
         t_state = task_ex.state
+
+        # Once a task is completed its next tasks don't change so they are
+        # calculated only once rather than evaluating task outbound context
+        # and transition conditions every time they're needed.
+        memo = (task_ex.runtime_context or {}).get(_NEXT_TASK_NAMES)
+
+        if memo and memo['state'] == t_state:
+            return list(memo['names'])
+
+        t_names = self._evaluate_next_task_names(task_ex)
+
+        if states.is_completed(t_state):
+            if task_ex.runtime_context is None:
+                task_ex.runtime_context = {}
+
+            task_ex.runtime_context[_NEXT_TASK_NAMES] = {
+                'state': t_state,
+                'names': t_names
+            }
+
+        return list(t_names)
+
+    def _evaluate_next_task_names(self, task_ex):
+        t_state = task_ex.state
         t_name = task_ex.name
 
         ctx = data_flow.evaluate_task_outbound_context(task_ex)
@@ -225,9 +265,8 @@ class DirectWorkflowController(base.WorkflowController):
                 cmd.task_spec.get_join()):
             return False
 
-        return wf_utils.find_task_execution_not_state(
-            self.wf_ex,
-            cmd.task_spec,
+        return self.get_task_executions_index().find_task_execution_not_state(
+            cmd.task_spec.get_name(),
             states.WAITING
         )
 
@@ -255,7 +294,9 @@ class DirectWorkflowController(base.WorkflowController):
         if isinstance(join_expr, int) and num < join_expr:
             return True
 
-        if join_expr == 'all' and len(in_task_specs) > num:
+        fan_in = self.wf_spec.get_join_fan_in(task_spec)
+
+        if join_expr == 'all' and fan_in > num:
             return True
 
         if join_expr == 'one' and num == 0:
@@ -267,9 +308,8 @@ class DirectWorkflowController(base.WorkflowController):
     # we may have multiple task executions for a task. It should
     # accept inbound task execution rather than a spec.
     def _triggers_join(self, join_task_spec, inbound_task_spec):
-        in_t_execs = wf_utils.find_task_executions_by_spec(
-            self.wf_ex,
-            inbound_task_spec
+        in_t_execs = self.get_task_executions_index().find_by_name(
+            inbound_task_spec.get_name()
         )
 
         # TODO(rakhmerov): Temporary hack. See the previous comment.
@@ -12,15 +12,11 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import networkx as nx
-from networkx.algorithms import traversal
-
 from mistral import exceptions as exc
 from mistral.workflow import base
 from mistral.workflow import commands
 from mistral.workflow import data_flow
 from mistral.workflow import states
-from mistral.workflow import utils as wf_utils
 
 
 class ReverseWorkflowController(base.WorkflowController):
@@ -71,21 +67,16 @@ class ReverseWorkflowController(base.WorkflowController):
         return task_spec
 
     def _get_upstream_task_executions(self, task_spec):
-        t_specs = [
-            self.wf_spec.get_tasks()[t_name]
-            for t_name in self._get_task_requires(task_spec)
-            or []
-        ]
-
         return filter(
             lambda t_e: t_e.state == states.SUCCESS,
-            wf_utils.find_task_executions_by_specs(self.wf_ex, t_specs)
+            self.get_task_executions_index().find_by_names(
+                self.wf_spec.get_task_requires(task_spec)
+            )
         )
 
     def evaluate_workflow_final_context(self):
-        task_execs = wf_utils.find_task_executions_by_spec(
-            self.wf_ex,
-            self._get_target_task_specification()
+        task_execs = self.get_task_executions_index().find_by_name(
+            self._get_target_task_specification().get_name()
         )
 
         # NOTE: For reverse workflow there can't be multiple
@@ -98,91 +89,36 @@ class ReverseWorkflowController(base.WorkflowController):
         return task_ex.state != states.ERROR
 
     def all_errors_handled(self):
-        return len(wf_utils.find_error_task_executions(self.wf_ex)) == 0
+        t_ex_index = self.get_task_executions_index()
+
+        return len(t_ex_index.find_with_state(states.ERROR)) == 0
 
     def _find_task_specs_with_satisfied_dependencies(self):
         """Given a target task name finds tasks with no dependencies.
 
         :return: Task specifications with no dependencies.
         """
-        tasks_spec = self.wf_spec.get_tasks()
-
-        graph = self._build_graph(tasks_spec)
+        target_task_spec = self._get_target_task_specification()
 
-        # Unwind tasks from the target task
-        # and filter out tasks with dependencies.
+        # Plan contains the target task and all tasks it depends on
+        # so we just need to filter out tasks with unsatisfied dependencies.
         return [
             t_s for t_s in
-            traversal.dfs_postorder_nodes(
-                graph.reverse(),
-                self._get_target_task_specification()
-            )
+            self.wf_spec.get_task_plan(target_task_spec.get_name())
             if self._is_satisfied_task(t_s)
         ]
 
-    def _task_exists(self, task_name):
-        return self.wf_spec.get_tasks()[task_name] is not None
-
     def _is_satisfied_task(self, task_spec):
-        task_requires = self._get_task_requires(task_spec)
-
-        for req in task_requires:
-            if not self._task_exists(req):
-                raise exc.WorkflowException(
-                    "Task '%s' not found." % req
-                )
+        t_ex_index = self.get_task_executions_index()
 
-        if wf_utils.find_task_executions_by_spec(self.wf_ex, task_spec):
+        if t_ex_index.has_task_executions(task_spec.get_name()):
             return False
 
-        if not self._get_task_requires(task_spec):
-            return True
-
-        success_t_names = set()
-
-        for t_ex in self.wf_ex.task_executions:
-            if t_ex.state == states.SUCCESS:
-                success_t_names.add(t_ex.name)
-
-        return not (set(self._get_task_requires(task_spec)) - success_t_names)
+        task_requires = self.wf_spec.get_task_requires(task_spec)
 
-    def _build_graph(self, tasks_spec):
-        graph = nx.DiGraph()
-
-        # Add graph nodes.
-        for t in tasks_spec:
-            graph.add_node(t)
-
-        # Add graph edges.
-        for t_spec in tasks_spec:
-            for dep_t_spec in self._get_dependency_tasks(tasks_spec, t_spec):
-                graph.add_edge(dep_t_spec, t_spec)
-
-        return graph
-
-    def _get_dependency_tasks(self, tasks_spec, task_spec):
-        dep_task_names = self._get_task_requires(task_spec)
-
-        if len(dep_task_names) == 0:
-            return []
-
-        dep_t_specs = set()
-
-        for t_spec in tasks_spec:
-            for t_name in dep_task_names:
-                if t_name == t_spec.get_name():
-                    dep_t_specs.add(t_spec)
-
-        return dep_t_specs
-
-    def _get_task_requires(self, task_spec):
-        requires = set(task_spec.get_requires())
-
-        task_defaults = self.wf_spec.get_task_defaults()
-
-        if task_defaults:
-            requires |= set(task_defaults.get_requires())
+        if not task_requires:
+            return True
 
-        requires.discard(task_spec.get_name())
+        success_t_names = t_ex_index.get_task_names_with_state(states.SUCCESS)
 
-        return list(requires)
+        return not (set(task_requires) - success_t_names)
@@ -12,6 +12,8 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
+
 from mistral.utils import serializers
 from mistral.workflow import states
 
@@ -45,6 +47,74 @@ class ResultSerializer(serializers.Serializer):
         return Result(entity['data'], entity['error'])
 
 
+class TaskExecutionIndex(object):
+    """Index of workflow task executions by task name and by state.
+
+    It's built with one pass over task executions of a workflow execution
+    so that workflow controllers don't need to scan all of them every time
+    they look for executions of a particular task or in a particular state.
+    The index is a snapshot, i.e. it needs to be rebuilt if task executions
+    are added or change their states.
+    """
+
+    def __init__(self, task_execs):
+        self._by_name = collections.defaultdict(list)
+        self._by_state = collections.defaultdict(list)
+        self._names_by_state = collections.defaultdict(set)
+        self._completed = []
+        self._incomplete = []
+
+        for t_ex in task_execs:
+            self._by_name[t_ex.name].append(t_ex)
+            self._by_state[t_ex.state].append(t_ex)
+            self._names_by_state[t_ex.state].add(t_ex.name)
+
+            if states.is_completed(t_ex.state):
+                self._completed.append(t_ex)
+            else:
+                self._incomplete.append(t_ex)
+
+    def find_by_name(self, task_name):
+        return list(self._by_name.get(task_name, []))
+
+    def find_by_names(self, task_names):
+        res = []
+
+        for t_name in task_names:
+            res += self._by_name.get(t_name, [])
+
+        return res
+
+    def find_with_state(self, state):
+        return list(self._by_state.get(state, []))
+
+    def find_task_execution_with_state(self, task_name, state):
+        for t_ex in self._by_name.get(task_name, []):
+            if t_ex.state == state:
+                return t_ex
+
+        return None
+
+    def find_task_execution_not_state(self, task_name, state):
+        for t_ex in self._by_name.get(task_name, []):
+            if t_ex.state != state:
+                return t_ex
+
+        return None
+
+    def find_completed(self):
+        return list(self._completed)
+
+    def find_incomplete(self):
+        return list(self._incomplete)
+
+    def has_task_executions(self, task_name):
+        return bool(self._by_name.get(task_name))
+
+    def get_task_names_with_state(self, state):
+        return self._names_by_state.get(state, set())
+
+
 def find_task_execution_not_state(wf_ex, task_spec, state):
     task_execs = [
         t for t in wf_ex.task_executions
@@ -111,7 +181,7 @@ def construct_fail_info_message(wf_ctrl, wf_ex):
     # Try to find where error is exactly.
     failed_tasks = filter(
         lambda t: not wf_ctrl.is_error_handled_for(t),
-        find_error_task_executions(wf_ex)
+        wf_ctrl.get_task_executions_index().find_with_state(states.ERROR)
     )
 
     errors = []
@@ -14,7 +14,6 @@
 
 import six
 
-from mistral.db.v2 import api as db_api
 from mistral import exceptions as exc
 from mistral.workflow import states
 
@@ -24,31 +23,67 @@ _CONCURRENCY = 'concurrency'
 _COUNT = 'count'
 _WITH_ITEMS = 'with_items_context'
 
+# Counters of task action executions kept in with-items context so that
+# the state of iterations is known without going through all of them.
+# Index is the number of executions started so far.
+_INDEX = 'index'
+_ACCEPTED = 'accepted'
+_RUNNING = 'running'
+_ERROR = 'error'
+
 
 def _get_context(task_ex):
     return task_ex.runtime_context[_WITH_ITEMS]
 
 
+def _get_counters(task_ex):
+    """Returns with-items context making sure it has execution counters.
+
+    Tasks started before the counters were introduced get them calculated
+    from their executions once.
+    """
+    with_items_context = _get_context(task_ex)
+
+    if _INDEX not in with_items_context:
+        exs = task_ex.executions
+
+        with_items_context.update({
+            _INDEX: len(exs),
+            _ACCEPTED: len([ex for ex in exs if ex.accepted]),
+            _RUNNING: len([
+                ex for ex in exs
+                if not ex.accepted and ex.state == states.RUNNING
+            ]),
+            _ERROR: len([
+                ex for ex in exs
+                if ex.accepted and ex.state == states.ERROR
+            ])
+        })
+
+    return with_items_context
+
+
+def _update_counters(task_ex, **deltas):
+    with_items_context = _get_counters(task_ex)
+
+    for k, delta in deltas.items():
+        with_items_context[k] = max(with_items_context[k] + delta, 0)
+
+    task_ex.runtime_context.update({_WITH_ITEMS: with_items_context})
+
+
 def get_count(task_ex):
     return _get_context(task_ex)[_COUNT]
 
 
 def is_completed(task_ex):
-    action_exs = db_api.get_action_executions(
-        task_execution_id=task_ex.id,
-        accepted=True
-    )
     count = get_count(task_ex) or 1
 
-    return count == len(action_exs)
+    return count == _get_counters(task_ex)[_ACCEPTED]
 
 
 def get_index(task_ex):
-    return len(
-        filter(
-            lambda x: x.accepted or states.RUNNING, task_ex.executions
-        )
-    )
+    return _get_counters(task_ex)[_INDEX]
 
 
 def get_concurrency(task_ex):
@@ -56,14 +91,48 @@ def get_concurrency(task_ex):
 
 
 def get_final_state(task_ex):
-    find_error = lambda x: x.accepted and x.state == states.ERROR
-
-    if filter(find_error, task_ex.executions):
+    if _get_counters(task_ex)[_ERROR]:
         return states.ERROR
     else:
         return states.SUCCESS
 
 
+def on_executions_started(task_ex, number):
+    """Must be called when task action executions get started."""
+    _update_counters(task_ex, **{_INDEX: number, _RUNNING: number})
+
+
+def on_action_complete(task_ex, action_ex):
+    """Must be called once a result of task action execution is stored."""
+    deltas = {_RUNNING: -1}
+
+    if action_ex.accepted:
+        deltas[_ACCEPTED] = 1
+
+        if action_ex.state == states.ERROR:
+            deltas[_ERROR] = 1
+
+    _update_counters(task_ex, **deltas)
+
+
+def on_executions_unaccepted(task_ex, action_exs):
+    """Must be called before results of task action executions are
+    unaccepted (e.g. when the task gets rerun).
+    """
+    if not (task_ex.runtime_context or {}).get(_WITH_ITEMS):
+        return
+
+    accepted = [ex for ex in action_exs if ex.accepted]
+
+    _update_counters(
+        task_ex,
+        **{
+            _ACCEPTED: -len(accepted),
+            _ERROR: -len([ex for ex in accepted if ex.state == states.ERROR])
+        }
+    )
+
+
 def _get_indices_if_rerun(unaccepted_executions):
     """Returns a list of indices in case of re-running with-items.
 
@@ -91,7 +160,14 @@ def get_indices_for_loop(task_ex):
     capacity = _get_context(task_ex)[_CAPACITY]
     count = get_count(task_ex)
 
-    unaccepted = _get_unaccepted_act_exs(task_ex)
+    counters = _get_counters(task_ex)
+
+    # Go through executions only if some of them are completed but
+    # not accepted which means the task is being rerun.
+    if counters[_INDEX] > counters[_ACCEPTED] + counters[_RUNNING]:
+        unaccepted = _get_unaccepted_act_exs(task_ex)
+    else:
+        unaccepted = []
 
     if unaccepted:
         indices = _get_indices_if_rerun(unaccepted)
@@ -130,7 +206,7 @@ def increase_capacity(task_ex):
         task_ex.runtime_context.update({_WITH_ITEMS: with_items_context})
 
 
-def prepare_runtime_context(task_ex, task_spec, input_dicts):
+def prepare_runtime_context(task_ex, task_spec, count):
     runtime_context = task_ex.runtime_context
     with_items_spec = task_spec.get_with_items()
 
@@ -138,10 +214,24 @@ def prepare_runtime_context(task_ex, task_spec, input_dicts):
         # Prepare current indexes and parallel limitation.
         runtime_context[_WITH_ITEMS] = {
             _CAPACITY: get_concurrency(task_ex),
-            _COUNT: len(input_dicts)
+            _COUNT: count,
+            _INDEX: 0,
+            _ACCEPTED: 0,
+            _RUNNING: 0,
+            _ERROR: 0
         }
 
 
+def get_items_count(with_items_input):
+    """Returns the number of iterations for validated with-items input."""
+    return len(with_items_input.values()[0]) if with_items_input else 0
+
+
+def get_item_input(with_items_input, index):
+    """Returns values of with-items variables for the given iteration."""
+    return dict((k, v[index]) for k, v in with_items_input.items())
+
+
 def validate_input(with_items_input):
     # Take only mapped values and check them.
     values = with_items_input.values()
@@ -164,9 +254,6 @@ def validate_input(with_items_input):
 def has_more_iterations(task_ex):
     # See action executions which have been already
     # accepted or are still running.
-    action_exs = filter(
-        lambda x: x.accepted or x.state == states.RUNNING,
-        task_ex.executions
-    )
+    counters = _get_counters(task_ex)
 
-    return get_count(task_ex) > len(action_exs)
+    return get_count(task_ex) > counters[_ACCEPTED] + counters[_RUNNING]
@@ -0,0 +1,99 @@
+# Copyright 2015 - Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Micro-benchmark of simple path expression evaluation.
+
+It compares resolving simple path expressions like '$.server.id' directly
+against the data context with evaluating them by YAQL. Usage example:
+
+  python tools/benchmark_expressions.py --repeat 10000
+"""
+
+import argparse
+import time
+
+from mistral import expressions as expr
+
+
+EXPRESSIONS = [
+    '$.vm_id',
+    '$.server.name',
+    '$.server.addresses.private[0]',
+    '$.servers[-1].name'
+]
+
+
+def _generate_context(var_count):
+    ctx = {
+        'vm_id': '03ea824a-aa24-4105-9131-66c48ae54acf',
+        'server': {
+            'name': 'cloud-fedora',
+            'addresses': {'private': ['10.0.0.2', '10.0.0.3']}
+        },
+        'servers': [{'name': 'vm%s' % i} for i in range(10)]
+    }
+
+    for i in range(var_count):
+        ctx['var%s' % i] = 'value%s' % i
+
+    return ctx
+
+
+def _measure(func, repeat):
+    start = time.time()
+
+    for _ in range(repeat):
+        func()
+
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10000)
+    parser.add_argument('--context-vars', type=int, default=100)
+
+    args = parser.parse_args()
+
+    ctx = _generate_context(args.context_vars)
+
+    for e in EXPRESSIONS:
+        assert expr.get_simple_path(e) is not None
+
+        native = expr.YAQLEvaluator.evaluate(e, ctx)
+        yaql = expr.YAQLEvaluator._evaluate_yaql(e, ctx)
+
+        assert native == yaql, (e, native, yaql)
+
+    def evaluate_native():
+        for e in EXPRESSIONS:
+            expr.YAQLEvaluator.evaluate(e, ctx)
+
+    def evaluate_yaql():
+        for e in EXPRESSIONS:
+            expr.YAQLEvaluator._evaluate_yaql(e, ctx)
+
+    yaql_time = _measure(evaluate_yaql, args.repeat)
+    native_time = _measure(evaluate_native, args.repeat)
+
+    count = args.repeat * len(EXPRESSIONS)
+
+    print("Evaluated expressions: %s" % count)
+    print("YAQL: %.3f sec" % yaql_time)
+    print("Native path resolution: %.3f sec" % native_time)
+    print("Speedup: %.1fx" % (yaql_time / native_time))
+
+
+if __name__ == '__main__':
+    main()
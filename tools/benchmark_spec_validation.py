@@ -0,0 +1,117 @@
+# Copyright 2015 - Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Micro-benchmark of DSL specification schema validation.
+
+It generates a large workbook and compares validating all its task
+specifications against a freshly merged schema (what happened before
+validators were compiled once per specification class) with validating
+them by the precompiled validator. Usage example:
+
+  python tools/benchmark_spec_validation.py --workflows 10 --tasks 100
+"""
+
+import argparse
+import copy
+import jsonschema
+import time
+
+from mistral.workbook import parser as spec_parser
+
+
+def _generate_workbook(wf_count, task_count):
+    workflows = {}
+
+    for wf_idx in range(wf_count):
+        wf_tasks = {}
+
+        for t_idx in range(task_count):
+            task = {
+                'action': 'std.echo output=<% $.param %>',
+                'publish': {'result': '<%% $.task%s %%>' % t_idx},
+                'retry': {'count': 3, 'delay': 1}
+            }
+
+            if t_idx < task_count - 1:
+                task['on-success'] = ['task%s' % (t_idx + 1)]
+
+            wf_tasks['task%s' % t_idx] = task
+
+        workflows['wf%s' % wf_idx] = {
+            'input': ['param'],
+            'tasks': wf_tasks
+        }
+
+    return {
+        'version': '2.0',
+        'name': 'benchmark_wb',
+        'workflows': workflows
+    }
+
+
+def _measure(func, repeat):
+    start = time.time()
+
+    for _ in range(repeat):
+        func()
+
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workflows', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args()
+
+    wb_dict = _generate_workbook(args.workflows, args.tasks)
+
+    # Parsing the workbook injects service keys (name, type, version)
+    # into task data, so take task data after parsing.
+    wb_spec = spec_parser.get_workbook_spec(copy.deepcopy(wb_dict))
+
+    task_specs = [
+        t_s for wf_spec in wb_spec.get_workflows()
+        for t_s in wf_spec.get_tasks()
+    ]
+
+    def validate_merged_schema():
+        for t_s in task_specs:
+            jsonschema.validate(t_s.to_dict(), t_s.__class__.get_schema())
+
+    def validate_compiled():
+        for t_s in task_specs:
+            t_s.__class__._get_schema_validator().validate(t_s.to_dict())
+
+    print("Task specifications: %s" % len(task_specs))
+
+    merged_time = _measure(validate_merged_schema, args.repeat)
+    compiled_time = _measure(validate_compiled, args.repeat)
+
+    print("Merged schema per validation: %.3f sec" % merged_time)
+    print("Precompiled validators: %.3f sec" % compiled_time)
+    print("Speedup: %.1fx" % (merged_time / compiled_time))
+
+    parse_time = _measure(
+        lambda: spec_parser.get_workbook_spec(copy.deepcopy(wb_dict)),
+        args.repeat
+    )
+
+    print("Full workbook parsing: %.3f sec" % (parse_time / args.repeat))
+
+
+if __name__ == '__main__':
+    main()